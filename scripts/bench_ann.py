@@ -0,0 +1,79 @@
+# scripts/bench_ann.py
+"""
+IVF recall/latency benchmark against brute force (no Ollama needed).
+
+Generates clustered synthetic unit vectors (real embeddings are clustered by
+topic; uniform random vectors are the worst case for any ANN index), builds
+an IVFIndex and sweeps nprobe, reporting recall@k against exact search and
+query latency. Pick RAG_NPROBE from the first row with acceptable recall.
+
+    python scripts/bench_ann.py --n 200000 --dim 768 --k 3
+    python scripts/bench_ann.py --index content/index_vectors.npy   # your published build
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from mh_core.ann import IVFIndex, default_nlist  # noqa: E402
+from mh_core.index_build import resolve_index  # noqa: E402
+from mh_core.rag import _top_k  # noqa: E402
+from mh_core.vector_index import VectorIndex  # noqa: E402
+
+
+def _clustered(rng, n, dim, topics):
+    centres = rng.standard_normal((topics, dim), dtype=np.float32)
+    vecs = centres[rng.integers(topics, size=n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--topics", type=int, default=500, help="synthetic clusters")
+    ap.add_argument("--index", type=Path, help="benchmark an existing index_vectors.npy instead")
+    ap.add_argument("--nlist", type=int, default=0, help="IVF cells (0 = ~4*sqrt(n))")
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    ap.add_argument("--k", type=int, default=3)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.index:
+        vectors, _ = resolve_index(args.index, args.index.with_name("index_meta.json"))
+        index = VectorIndex.load(vectors, mmap=True)
+        vecs = np.stack([index.vector(i) for i in range(len(index))])
+    else:
+        vecs = _clustered(rng, args.n, args.dim, args.topics)
+        index = VectorIndex(vecs)
+    n = len(vecs)
+    # queries: stored vectors plus noise, like a user paraphrasing a snippet
+    queries = vecs[rng.integers(n, size=args.queries)] + 0.3 * rng.standard_normal((args.queries, vecs.shape[1]), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    t0 = time.perf_counter()
+    ivf = IVFIndex.build(vecs, nlist=args.nlist or default_nlist(n))
+    print(f"n={n} dim={vecs.shape[1]} nlist={ivf.nlist} build {time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    exact = [set(_top_k(index.scores(q), args.k)) for q in queries]
+    brute_ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+    print(f"{'nprobe':>7} {'recall@' + str(args.k):>9} {'scanned':>8} {'ms/query':>9} {'speedup':>8}")
+    print(f"{'brute':>7} {1.0:>9.3f} {1.0:>8.1%} {brute_ms:>9.3f} {1.0:>7.1f}x")
+    for nprobe in args.nprobe:
+        if nprobe > ivf.nlist:
+            break
+        t0 = time.perf_counter()
+        found = [set(ivf.search(index, q, args.k, nprobe)[0]) for q in queries]
+        ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+        recall = np.mean([len(f & e) / len(e) for f, e in zip(found, exact)])
+        scanned = np.mean([ivf.candidates(q, nprobe).size for q in queries[:20]]) / n
+        print(f"{nprobe:>7} {recall:>9.3f} {scanned:>8.1%} {ms:>9.3f} {brute_ms / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
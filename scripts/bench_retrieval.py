@@ -0,0 +1,67 @@
+# scripts/bench_retrieval.py
+"""
+Retrieval micro-benchmark on synthetic unit vectors (no Ollama needed).
+
+Compares the old path (similarities -> Python list -> full sorted() with a
+lambda key) against rag._top_k (argpartition + sort of k items), then times
+VectorIndex scoring per storage dtype (float32 / float16 / int8).
+
+    python scripts/bench_retrieval.py --sizes 1000 10000 100000 200000 --dim 768 --k 3
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from mh_core.rag import _top_k  # noqa: E402
+from mh_core.vector_index import DTYPES, VectorIndex  # noqa: E402
+
+
+def _legacy_top_k(sims, k):
+    sims = sims.tolist()
+    return sorted(range(len(sims)), key=lambda i: sims[i], reverse=True)[:k]
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 200000])
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--k", type=int, default=3)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'n':>9} {'matmul ms':>10} {'sort ms':>10} {'top-k ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        vecs = rng.standard_normal((n, args.dim), dtype=np.float32)
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        q = vecs[rng.integers(n)]
+        sims = vecs @ q
+        assert list(_top_k(sims, args.k)) == _legacy_top_k(sims, args.k)
+        t_mm = _time(lambda: vecs @ q, args.repeat)
+        t_old = _time(lambda: _legacy_top_k(sims, args.k), args.repeat)
+        t_new = _time(lambda: _top_k(sims, args.k), args.repeat)
+        print(f"{n:>9} {t_mm:>10.2f} {t_old:>10.2f} {t_new:>10.3f} {t_old / t_new:>7.0f}x")
+        exact = set(_top_k(sims, args.k))
+        for dtype in DTYPES:
+            idx = VectorIndex.from_vectors(vecs, dtype)
+            t = _time(lambda: idx.scores(q), args.repeat)
+            overlap = len(exact & set(_top_k(idx.scores(q), args.k))) / args.k
+            mb = idx.data.nbytes / 2**20 + (idx.scales.nbytes / 2**20 if idx.scales is not None else 0)
+            print(f"{'':>9}   {dtype:<8} score {t:>8.2f} ms  {mb:>8.1f} MB  top-{args.k} overlap {overlap:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,94 @@
-import json, os, http.client, numpy as np
+import argparse, sys, numpy as np
 from pathlib import Path
 
-EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")  # Ollama embedding model
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from mh_core.vector_index import DTYPES  # noqa: E402
+from mh_core.embed_cache import get_cache  # noqa: E402
+from mh_core.embeddings import BACKENDS, get_embedder  # noqa: E402
+from mh_core.index_build import build_index, load_manifest, load_snippets, manifest_path, resolve_index  # noqa: E402
+
 KNOW_PATH = Path("content/knowledge")
 OUT_VECS = Path("content/index_vectors.npy")
 OUT_META = Path("content/index_meta.json")
 
-def _embed_one(text: str):
-    """Embed a single text with Ollama. Handles both 'embedding' and 'embeddings'."""
-    conn = http.client.HTTPConnection("127.0.0.1", 11434, timeout=60)
-    payload = {"model": EMBED_MODEL, "input": text}
-    conn.request("POST", "/api/embeddings", body=json.dumps(payload), headers={"Content-Type":"application/json"})
-    resp = conn.getresponse()
-    raw = resp.read().decode("utf-8", errors="ignore")
-    conn.close()
-    obj = json.loads(raw)
-    if "embedding" in obj and isinstance(obj["embedding"], list):
-        return np.array(obj["embedding"], dtype="float32")
-    if "embeddings" in obj and isinstance(obj["embeddings"], list) and obj["embeddings"]:
-        return np.array(obj["embeddings"][0], dtype="float32")
-    raise RuntimeError(f"Unexpected embeddings response: {raw[:300]}")
+def _progress(done, total, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    end = "\n" if done == total else ""
+    print(f"\r  embedded {done}/{total} ({rate:.1f} texts/s)", end=end, flush=True)
 
-def load_snippets():
-    items=[]
-    for p in KNOW_PATH.glob("*.jsonl"):
-        for line in p.read_text(encoding="utf-8").splitlines():
-            if not line.strip():
-                continue
-            rec = json.loads(line)
-            items.append({
-                "id": rec["id"],
-                "text": rec["text"],
-                "topic": rec.get("topic","")
-            })
-    if not items:
-        raise SystemExit(f"No snippets found in {KNOW_PATH} (*.jsonl). Add some lines and re-run.")
-    return items
+def make_embedder(embedder, dim=None):
+    """
+    dim: vector width the model is expected to return (the published build's manifest),
+    or None to take it from the cache. The model server is only called when something
+    has to be embedded, so a fully cached rebuild works while it is down.
+    """
+    def embed_fresh(texts):
+        if not texts:
+            return {}
+        vecs = embedder.embed(texts, progress=_progress)
+        return {t: v / (np.linalg.norm(v) + 1e-9) for t, v in zip(texts, vecs)}
+
+    def embed_texts(texts):
+        """Embed texts with the backend, reusing the on-disk embedding cache where possible."""
+        cache = get_cache() if embedder.cacheable else None
+        cached = cache.get_many(embedder.name, texts) if cache is not None and texts else {}
+        width = dim
+        if width is None and len({v.shape[0] for v in cached.values()}) > 1:
+            # rows of several widths under one model name: one live embedding decides
+            width = int(np.asarray(embedder.embed_query(texts[0])).shape[0])
+        if width is not None:
+            cached = {t: v for t, v in cached.items() if v.shape[0] == width}
+        missing = [t for t in dict.fromkeys(texts) if t not in cached]
+        if cache is not None:
+            print(f"Embedding cache: {len(cached)} reused, {len(missing)} to embed")
+        fresh = embed_fresh(missing)
+        if fresh and cached:
+            # the server may not be the one that filled the cache (same name, other width)
+            width = next(iter(fresh.values())).shape[0]
+            stale = [t for t, v in cached.items() if v.shape[0] != width]
+            if stale:
+                print(f"Embedding cache: {len(stale)} rows have another width, re-embedding")
+                fresh.update(embed_fresh(stale))
+                cached = {t: v for t, v in cached.items() if v.shape[0] == width}
+        if cache is not None and fresh:
+            cache.put_many(embedder.name, fresh)
+        return [cached[t] if t in cached else fresh[t] for t in texts]
+    return embed_texts
 
 def main():
+    ap = argparse.ArgumentParser(description="Build the vector index used by rag.py")
+    ap.add_argument("--dtype", choices=DTYPES, default="float32",
+                    help="storage dtype; float16/int8 shrink the memory-mapped index (default float32)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="reuse vectors of unchanged snippets from the published build (index_manifest.json)")
+    ap.add_argument("--backend", choices=BACKENDS, default=None,
+                    help="embedding backend (default: EMBED_BACKEND or ollama); hashing needs no model server")
+    ap.add_argument("--batch-size", type=int, default=32, help="texts per /api/embed request (default 32)")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent embedding requests (default 4)")
+    ap.add_argument("--retries", type=int, default=3, help="retries per failed batch (default 3)")
+    ap.add_argument("--timeout", type=float, default=60, help="seconds per embedding request (default 60)")
+    ap.add_argument("--ann", action="store_true",
+                    help="also build an IVF index for approximate search (index_ivf.npz)")
+    ap.add_argument("--nlist", type=int, default=0,
+                    help="IVF cells; 0 picks ~4*sqrt(snippets) (default 0)")
+    args = ap.parse_args()
     KNOW_PATH.mkdir(parents=True, exist_ok=True)
-    items = load_snippets()
-    vecs = []
-    for it in items:
-        v = _embed_one(it["text"])
-        v = v / (np.linalg.norm(v) + 1e-9)
-        vecs.append(v)
-    vecs = np.stack(vecs).astype("float32")
-    np.save(OUT_VECS, vecs)
-    OUT_META.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Indexed {len(items)} snippets → {OUT_VECS} & {OUT_META}")
+    items = load_snippets(KNOW_PATH)
+    if not items:
+        raise SystemExit(f"No snippets found in {KNOW_PATH} (*.jsonl). Add some lines and re-run.")
+    embedder = get_embedder(args.backend, batch_size=args.batch_size, workers=args.workers, retries=args.retries,
+                            timeout=args.timeout)
+    manifest = load_manifest(manifest_path(resolve_index(OUT_VECS, OUT_META)[0])) or {}
+    dim = (manifest.get("dim") or None) if manifest.get("model") == embedder.name else None
+    counts = build_index(items, make_embedder(embedder, dim), OUT_VECS, OUT_META, model=embedder.name,
+                         dtype=args.dtype, incremental=args.incremental,
+                         ann_nlist=args.nlist if args.ann else None)
+    vecs, meta = resolve_index(OUT_VECS, OUT_META)
+    print(f"Indexed {counts['total']} snippets ({embedder.name}, {args.dtype}) → {vecs} & {meta}")
+    if args.ann:
+        print(f"  IVF index → {vecs.with_name('index_ivf.npz')}")
+    if args.incremental:
+        print(f"  reused {counts['reused']}, embedded {counts['embedded']}, dropped {counts['dropped']}")
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,13 @@
 import json
+import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 CONTENT = ROOT / "content"
 
+sys.path.insert(0, str(ROOT / "src"))
+from mh_core.index_build import resolve_index  # noqa: E402
+
 
 def load_jsonl(path: Path):
     items = []
@@ -54,7 +58,8 @@ def main():
 
     basics = load_jsonl(CONTENT / "knowledge" / "aimhiy_basics.jsonl")
     snippets = load_jsonl(CONTENT / "knowledge" / "stay_strong_snippets.jsonl")
-    idx_meta = json.loads((CONTENT / "index_meta.json").read_text(encoding="utf-8"))
+    _, meta_path = resolve_index(CONTENT / "index_vectors.npy", CONTENT / "index_meta.json")
+    idx_meta = json.loads(meta_path.read_text(encoding="utf-8"))
 
     # Style guide to embed as system for every example
     sgp = (CONTENT / "style_guide_local.json")
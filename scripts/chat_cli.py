@@ -1,31 +1,224 @@
 # scripts/chat_cli.py
 """
-Simple command-line chat client to test your running API.
-Keeps conversation state between turns.
+Command-line client for the chat API.
+
+Interactive (default): a single-user chat loop that keeps state between turns.
+
+    python scripts/chat_cli.py [--url http://127.0.0.1:8000]
+
+Load mode: N concurrent virtual users replay scripted multi-turn
+conversations (Stay Strong steps, crisis turns, fast/non-fast mixes) against
+/chat and report throughput, p50/p95/p99 latency and error rates.
+
+    python scripts/chat_cli.py load --users 20 --duration 30 --url http://127.0.0.1:8000
+    python scripts/chat_cli.py load --users 20 --conversations 10 --in-process --mock-latency 0.3
+
+--in-process runs the API inside this process (httpx ASGI transport) against
+a mock Ollama server, so a load test needs no running API and no model.
 """
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# 200 responses that mean the model call failed behind the API
+DEGRADED_REPLIES = {"...", "Sorry, I had trouble thinking just now."}
+
+# Scripted conversations: (name, turns). Each turn is one /chat request.
+SCRIPTS = [
+    ("stay_strong", [
+        "hi, i want to talk about how things are going",
+        "my strengths are footy and helping my little brother",
+        "i worry about exams and i cant sleep properly",
+        "my goal is to get to bed before 11 on school nights",
+        "my aunty and my coach can support me",
+        "next step is no phone after 10 tonight",
+    ]),
+    ("check_in", ["im stressed about exams", "cant sleep", "yeah just tired all the time"]),
+    ("crisis", ["feeling really low lately", "sometimes i want to end it", "yes please, who can i talk to"]),
+    ("crisis_okay", ["i want to kill myself", "im ok now, just venting"]),
+    ("yarn", ["deadly day at the footy with my mob", "shame job at school today though"]),
+]
+
+
+# ---------- interactive
+def interactive(url: str) -> None:
+    state = None
+    print("💬 Chat started. Type 'exit' to quit.")
+    with httpx.Client(base_url=url, timeout=120) as client:
+        while True:
+            msg = input("> ").strip()
+            if msg.lower() in {"exit", "quit"}:
+                print("👋 Goodbye!")
+                break
+            try:
+                res = client.post("/chat", json={"message": msg, "state": state})
+                res.raise_for_status()
+                data = res.json()
+                state = data.get("state")
+                if data.get("mode") == "crisis":
+                    print("🚨 Crisis flow → app shows support options.")
+                    for line in data.get("messages") or []:
+                        print(f"🤖 {line}")
+                if data.get("reply"):
+                    print(f"🤖 {data['reply']}")
+            except Exception as e:
+                print(f"❌ Error talking to API: {e}")
+
+
+# ---------- load
+class Results:
+    def __init__(self):
+        self.latencies = {}  # kind -> [seconds]
+        self.errors = Counter()
+        self.requests = 0
+        self.conversations = 0
 
-import requests
+    def add(self, kind: str, seconds: float, error: str = "") -> None:
+        self.requests += 1
+        if error:
+            self.errors[error] += 1
+        else:
+            self.latencies.setdefault(kind, []).append(seconds)
 
-API_URL = "http://127.0.0.1:8000/chat"
-state = None
 
-print("💬 Chat started. Type 'exit' to quit.")
-while True:
-    msg = input("> ").strip()
-    if msg.lower() in {"exit", "quit"}:
-        print("👋 Goodbye!")
-        break
+def _pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(p / 100.0 * len(values))) - 1))]
 
-    payload = {"message": msg, "state": state}
+
+async def _virtual_user(client, rng, args, results, deadline):
+    done = 0
+    while time.perf_counter() < deadline and (not args.conversations or done < args.conversations):
+        name, turns = rng.choice(SCRIPTS)
+        fast = rng.random() < args.fast_ratio
+        state = None
+        for message in turns:
+            if time.perf_counter() >= deadline:
+                return
+            payload = {"message": message, "state": state, "fast": fast}
+            if args.no_cache:
+                payload["no_cache"] = True
+            t0 = time.perf_counter()
+            try:
+                r = await client.post("/chat", json=payload)
+                elapsed = time.perf_counter() - t0
+                if r.status_code != 200:
+                    results.add(name, elapsed, f"HTTP {r.status_code}")
+                    break
+                data = r.json()
+                state = data.get("state")
+                if data.get("reply") in DEGRADED_REPLIES:
+                    results.add(name, elapsed, "degraded reply (model error)")
+                    continue
+                kind = "crisis" if data.get("mode") == "crisis" else ("llm_fast" if fast else "llm_rag")
+                results.add(kind, elapsed)
+            except httpx.HTTPError as e:
+                results.add(name, time.perf_counter() - t0, type(e).__name__)
+                break
+            if args.think:
+                await asyncio.sleep(rng.uniform(0, args.think))
+        results.conversations += 1
+        done += 1
+
+
+def _report(results: Results, wall: float, users: int) -> None:
+    ok = sum(len(v) for v in results.latencies.values())
+    print(f"\n{users} users, {results.conversations} conversations, {results.requests} requests in {wall:.1f}s")
+    print(f"throughput {results.requests / wall:.1f} req/s, errors {sum(results.errors.values())} "
+          f"({(sum(results.errors.values()) / results.requests if results.requests else 0):.1%})")
+    for err, n in results.errors.most_common():
+        print(f"  {n:>6}  {err}")
+    rows = sorted(results.latencies.items())
+    rows.append(("all", [x for v in results.latencies.values() for x in v]))
+    print(f"{'kind':<10} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, vals in rows:
+        if vals:
+            print(f"{kind:<10} {len(vals):>7} {_pct(vals, 50) * 1000:>9.1f} {_pct(vals, 95) * 1000:>9.1f} "
+                  f"{_pct(vals, 99) * 1000:>9.1f} {max(vals) * 1000:>9.1f}")
+    if not ok:
+        print("no successful requests")
+
+
+def _in_process_client(args):
+    """Start a mock Ollama and return (httpx client bound to the app in this process, mock)."""
+    sys.path.insert(0, str(SRC))
+    from mh_core.mock_ollama import MockOllama
+
+    mock = MockOllama(latency=args.mock_latency, token_rate=args.mock_token_rate,
+                      fail_rate=args.mock_fail_rate, seed=args.seed).start()
+    # must be set before mh_core.api (and ai_gateway) are imported
+    os.environ["OLLAMA_HOST"], os.environ["OLLAMA_PORT"] = mock.host, str(mock.port)
+    # keep mock vectors and load-test turns out of the developer's real caches and stores,
+    # and pin the in-memory reply cache to its default so runs compare (--no-cache opts out)
+    os.environ["EMBED_CACHE_PATH"] = "off"
+    os.environ["SESSION_STORE"] = "off"
+    os.environ["RESPONSE_CACHE_MAX"] = "512"
+    from mh_core.api import app
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://app", timeout=args.timeout), mock
+
+
+async def run_load(args) -> None:
+    mock = None
+    if args.in_process:
+        client, mock = _in_process_client(args)
+    else:
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+    results = Results()
+    deadline = time.perf_counter() + (args.duration if args.duration else float("inf"))
+    t0 = time.perf_counter()
     try:
-        res = requests.post(API_URL, json=payload)
-        res.raise_for_status()
-        data = res.json()
-        state = data.get("state")
-        tool = data.get("tool")
-        if tool == "route_to_support":
-            print("🚨 Crisis detected → app should show support screen.")
-        if data.get("reply"):
-            print(f"🤖 {data['reply']}")
-    except Exception as e:
-        print(f"❌ Error talking to API: {e}")
+        async with client:
+            await asyncio.gather(*(
+                _virtual_user(client, random.Random(args.seed + i), args, results, deadline)
+                for i in range(args.users)
+            ))
+    finally:
+        if mock is not None:
+            mock.stop()
+    _report(results, time.perf_counter() - t0, args.users)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    sub = ap.add_subparsers(dest="mode")
+    load = sub.add_parser("load", help="concurrent scripted conversations")
+    load.add_argument("--url", default=argparse.SUPPRESS, help="API base URL")
+    load.add_argument("--users", type=int, default=10, help="concurrent virtual users (default 10)")
+    load.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = no limit)")
+    load.add_argument("--conversations", type=int, default=5,
+                      help="conversations per user (0 = until --duration; default 5)")
+    load.add_argument("--fast-ratio", type=float, default=0.5, help="share of conversations in fast mode")
+    load.add_argument("--think", type=float, default=0.0, help="max random pause between turns (s)")
+    load.add_argument("--no-cache", action="store_true", help="send no_cache so every turn reaches the model")
+    load.add_argument("--timeout", type=float, default=120.0)
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--in-process", action="store_true", help="run the API in-process against a mock Ollama")
+    load.add_argument("--mock-latency", type=float, default=0.0, help="mock Ollama delay per call (s)")
+    load.add_argument("--mock-token-rate", type=float, default=0.0, help="mock tokens per second (0 = instant)")
+    load.add_argument("--mock-fail-rate", type=float, default=0.0, help="share of mock calls that fail")
+    args = ap.parse_args()
+    if args.mode == "load":
+        if not args.conversations and not args.duration:
+            ap.error("load needs --conversations or --duration")
+        asyncio.run(run_load(args))
+    else:
+        interactive(args.url)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
-﻿import http.client
-import json
+﻿import json
 import os
+import sys
+import threading
+
+from .http_pool import ollama_pool, async_ollama_client
 
 # Ollama local server defaults
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "127.0.0.1")
@@ -10,14 +13,8 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b-instruct-q4_K_M")
 
 
 
-def call_ollama_chat(messages, temperature=0.3, top_p=0.9, max_tokens=90):
-    """
-    Calls Ollama's /api/chat with:
-    - Shorter replies for speed
-    - keep_alive so model stays warm
-    - num_thread from env (OLLAMA_NUM_THREADS) if provided
-    """
-    payload = {
+def _chat_payload(messages, temperature, top_p, max_tokens, stream):
+    return {
         "model": OLLAMA_MODEL,
         "messages": messages,
         "options": {
@@ -26,23 +23,146 @@ def call_ollama_chat(messages, temperature=0.3, top_p=0.9, max_tokens=90):
             "num_predict": max_tokens,
             "num_thread": int(os.getenv("OLLAMA_NUM_THREADS", "0") or "0"),
         },
-        "stream": False,
+        "stream": stream,
         "keep_alive": "10m",
     }
-    conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=60)
-    conn.request("POST", "/api/chat", body=json.dumps(payload), headers={"Content-Type": "application/json"})
-    resp = conn.getresponse()
-    data = resp.read().decode("utf-8", errors="ignore")
-    conn.close()
 
+
+# ---------- timings
+# Ollama's final chat object reports where the time went. prompt_eval_* covers the
+# prompt tokens it actually evaluated: when the static system prefix is served
+# from the KV cache, prompt_eval_count drops to roughly the per-turn tokens.
+_COUNT_FIELDS = ("prompt_eval_count", "eval_count")
+_DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+LOG_TIMINGS = os.getenv("OLLAMA_LOG_TIMINGS", "false").lower() in ("1", "true", "yes")
+
+
+def parse_timings(obj: dict):
+    """Counts and durations (ns -> ms) from a done chat object, or None if absent."""
+    out = {}
+    for key in _COUNT_FIELDS:
+        if isinstance(obj.get(key), int):
+            out[key] = obj[key]
+    for key in _DURATION_FIELDS:
+        if isinstance(obj.get(key), (int, float)):
+            out[key.replace("_duration", "_ms")] = round(obj[key] / 1e6, 2)
+    return out or None
+
+
+class LLMTimings:
+    """Running totals of Ollama's per-call timings, for /debug/llm."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self._sums = {}
+        self.last = None
+
+    def record(self, timings) -> None:
+        if not timings:
+            return
+        with self._lock:
+            self.calls += 1
+            self.last = timings
+            for key, value in timings.items():
+                self._sums[key] = self._sums.get(key, 0) + value
+        if LOG_TIMINGS:
+            print(
+                "[ollama] prompt_eval {0} tok / {1} ms, eval {2} tok / {3} ms".format(
+                    timings.get("prompt_eval_count"), timings.get("prompt_eval_ms"),
+                    timings.get("eval_count"), timings.get("eval_ms"),
+                ),
+                file=sys.stderr,
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls, sums, last = self.calls, dict(self._sums), self.last
+        avg = {k: round(v / calls, 2) for k, v in sums.items()} if calls else {}
+        return {"calls": calls, "avg": avg, "last": last}
+
+
+LLM_TIMINGS = LLMTimings()
+
+
+def call_ollama_chat(messages, temperature=0.3, top_p=0.9, max_tokens=90):
+    """
+    Calls Ollama's /api/chat with:
+    - Shorter replies for speed
+    - keep_alive so model stays warm
+    - num_thread from env (OLLAMA_NUM_THREADS) if provided
+    """
+    payload = _chat_payload(messages, temperature, top_p, max_tokens, stream=False)
+    _, raw = ollama_pool().request(
+        "POST", "/api/chat", body=json.dumps(payload), headers={"Content-Type": "application/json"}, timeout=60
+    )
+    return _reply_from_body(raw)
+
+
+def _reply_from_body(raw: bytes) -> str:
     try:
-        obj = json.loads(data)
+        obj = json.loads(raw.decode("utf-8", errors="ignore"))
     except Exception:
         return "Sorry, I had trouble thinking just now."
 
+    LLM_TIMINGS.record(parse_timings(obj))
     return (obj.get("message") or {}).get("content", "").strip() or "..."
 
 
+async def call_ollama_chat_async(messages, temperature=0.3, top_p=0.9, max_tokens=90):
+    """Non-blocking call_ollama_chat for the async request path."""
+    payload = _chat_payload(messages, temperature, top_p, max_tokens, stream=False)
+    resp = await async_ollama_client().post("/api/chat", json=payload, timeout=60)
+    return _reply_from_body(resp.content)
+
+
+def stream_ollama_chat(messages, temperature=0.3, top_p=0.9, max_tokens=90):
+    """
+    Same request as call_ollama_chat but with "stream": true.
+    Yields content fragments as Ollama produces them (one NDJSON line each).
+    """
+    payload = _chat_payload(messages, temperature, top_p, max_tokens, stream=True)
+    with ollama_pool().stream(
+        "POST", "/api/chat", body=json.dumps(payload), headers={"Content-Type": "application/json"}, timeout=60
+    ) as resp:
+        for line in resp:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            piece = (obj.get("message") or {}).get("content", "")
+            if piece:
+                yield piece
+            if obj.get("done"):
+                LLM_TIMINGS.record(parse_timings(obj))
+                # drain anything left so the connection can be reused
+                resp.read()
+                break
+
+
+async def stream_ollama_chat_async(messages, temperature=0.3, top_p=0.9, max_tokens=90):
+    """Async generator version of stream_ollama_chat."""
+    payload = _chat_payload(messages, temperature, top_p, max_tokens, stream=True)
+    async with async_ollama_client().stream("POST", "/api/chat", json=payload, timeout=60) as resp:
+        async for line in resp.aiter_lines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            piece = (obj.get("message") or {}).get("content", "")
+            if piece:
+                yield piece
+            if obj.get("done"):
+                LLM_TIMINGS.record(parse_timings(obj))
+                break
+
+
 
 # Override the initial SYSTEM_PROMPT above with a plain-English, no-slang version
 # to ensure the chatbot does not use Australian colloquialisms or contractions.
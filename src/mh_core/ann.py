@@ -0,0 +1,118 @@
+# src/mh_core/ann.py
+"""
+Approximate nearest-neighbour search: IVF (inverted file) in pure NumPy.
+
+Build: spherical k-means splits the (unit-length) vectors into `nlist` cells;
+each vector is filed under its nearest centroid. Search: score the query
+against the centroids, then only against the vectors in the `nprobe` best
+cells. nprobe is the recall/latency knob: nprobe=nlist is exact brute force,
+small nprobe scans a small fraction of the index.
+
+The IVF file (index_ivf.npz) stores only centroids and row lists; vectors
+stay in the memory-mapped VectorIndex, so any storage dtype works.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .vector_index import VectorIndex
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-9)
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = 20, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (cosine). Returns (k, d) unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float32)
+    k = max(1, min(int(k), len(x)))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # re-seed empty cells with random points so every cell stays useful
+            sums[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+        new = _normalise(sums)
+        if np.allclose(new, centroids, atol=1e-5):
+            centroids = new
+            break
+        centroids = new
+    return centroids
+
+
+def default_nlist(n: int) -> int:
+    return max(1, min(n, int(4 * np.sqrt(n))))
+
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids.astype(np.float32)
+        self.order = order.astype(np.int64)      # row ids grouped by cell
+        self.offsets = offsets.astype(np.int64)  # cell c owns order[offsets[c]:offsets[c+1]]
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        iters: int = 20,
+        seed: int = 0,
+        max_train: int = 65536,
+    ) -> "IVFIndex":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        nlist = default_nlist(n) if not nlist else min(int(nlist), n)
+        rng = np.random.default_rng(seed)
+        train = vectors if n <= max_train else vectors[rng.choice(n, size=max_train, replace=False)]
+        centroids = kmeans(train, nlist, iters=iters, seed=seed)
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):
+            assign[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+        return cls(centroids, order, offsets)
+
+    def candidates(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        """Row ids in the nprobe cells nearest to q."""
+        nprobe = max(1, min(int(nprobe), self.nlist))
+        cs = self.centroids @ q
+        cells = np.argpartition(-cs, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        return np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+
+    def search(self, index: VectorIndex, q: np.ndarray, k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """(row ids, scores) of the approximate top-k, best first."""
+        q = np.asarray(q, dtype=np.float32)
+        rows = self.candidates(q, nprobe)
+        if rows.size == 0:
+            return rows, np.empty(0, dtype=np.float32)
+        rows.sort()  # ascending rows = sequential reads from the memory map
+        scores = index.scores_for(q, rows)
+        k = min(int(k), rows.size)
+        top = np.argpartition(-scores, k - 1)[:k] if k < rows.size else np.arange(rows.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return rows[top], scores[top]
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        with np.load(path) as z:
+            return cls(z["centroids"], z["order"], z["offsets"])
+
+
+def ivf_path(vectors_path: Path) -> Path:
+    return Path(vectors_path).with_name("index_ivf.npz")
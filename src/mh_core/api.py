@@ -1,12 +1,26 @@
-﻿from fastapi import FastAPI
+﻿from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from .models import ChatIn, ChatOut, ChatState
-from .crisis import contains_crisis_signal, support_lines, looks_okay_response
-from .ai_gateway import call_ollama_chat, SYSTEM_PROMPT
-from .rag import retrieve_context
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from .models import ChatIn, ChatOut, ChatState, ScreenBatchIn
+from .crisis import contains_crisis_signal, helpline_messages, looks_okay_response
+from .ai_gateway import call_ollama_chat_async, stream_ollama_chat_async, OLLAMA_MODEL, LLM_TIMINGS
+from . import prompting
+from .rag import retrieve_context_async
 from .culture import normalize_for_retrieval
-from pathlib import Path
+from .safety import filter_reply, StreamingReplyFilter, screen_batch
+from .http_pool import ollama_pool, pool_stats
+from .embed_cache import get_cache
+from .sessions import get_store, new_session_id
+from .response_cache import get_response_cache, response_key
+from .content_loader import CONTENT
+from .events import get_event_log
+from . import metrics
+from .metrics import stage
+from typing import Optional
+import os
+import time
+from contextlib import aclosing
 import json as _json
 
 app = FastAPI(title="MH Chatbot (Free-form, Small Model)")
@@ -19,53 +33,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing header with the per-stage breakdown (browser devtools show it)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+@app.middleware("http")
+async def _trace_stages(request: Request, call_next):
+    """Collect stage timings for this request; record total latency per path."""
+    trace, token = metrics.start_trace()
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.end_trace(token)
+    # for /chat/stream this is time to first byte: the generation is still running
+    total = time.perf_counter() - t0
+    route = request.scope.get("route")
+    metrics.observe_request(getattr(route, "path", "other"), total)
+    if SERVER_TIMING and trace:
+        response.headers["Server-Timing"] = metrics.server_timing(trace, total)
+    return response
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
 @app.post("/reset")
-def reset():
-    """Resets the chat state for a new conversation."""
+def reset(session_id: Optional[str] = None):
+    """Resets the chat state for a new conversation (and opens a session when a store is enabled)."""
     fresh = ChatState()
-    return JSONResponse({"state": fresh.model_dump()})
+    store = get_store()
+    if store is None:
+        return JSONResponse({"state": fresh.model_dump()})
+    if session_id:
+        store.delete(session_id)
+    return JSONResponse({"state": fresh.model_dump(), "session_id": store.create(fresh)})
 
-@app.post("/chat", response_model=ChatOut)
-def chat(body: ChatIn):
+async def _store_call(store, fn, *args):
+    """Run a session store call; SQLite goes to the threadpool so it never blocks the event loop."""
+    if store.blocking:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+async def _resolve_session(body: ChatIn):
+    """(session_id, state). session_id is None unless server-side sessions are enabled."""
+    store = get_store()
+    if store is None:
+        return None, body.state or ChatState()
+    state = await _store_call(store, store.get, body.session_id) if body.session_id else None
+    if state is not None:
+        return body.session_id, state
+    # new, expired or unknown id: open a fresh session under a server-issued id
+    return new_session_id(), body.state or ChatState()
+
+async def _respond(out: ChatOut, sid: Optional[str]) -> ChatOut:
+    """Store the turn's state server-side and send back only the session id."""
+    if sid is None:
+        return out
+    store = get_store()
+    await _store_call(store, store.put, sid, out.state or ChatState())
+    return out.model_copy(update={"state": None, "session_id": sid})
+
+async def _prepare_turn(body: ChatIn, state: ChatState):
     """
-    Free-form chat (dev):
-    - No auto-welcome (empty input returns nothing)
-    - Crisis bypassed for development (no helpline text)
-    - Non-crisis: add RAG context and call local LLM
+    Everything that happens before the LLM call.
+    Returns a ChatOut when the turn is answered without the model (empty input,
+    crisis flow), otherwise (messages, llm_kwargs, state) for the gateway.
     """
     user = (body.message or "").strip()
-    state = body.state or ChatState()
 
     if not user:
         return ChatOut(reply=None, state=state)
 
     # Crisis flow
     if state.crisis == "check":
-        if looks_okay_response(user):
+        with stage("crisis"):
+            okay = looks_okay_response(user)
+        if okay:
             state.crisis = "done"
             return ChatOut(
                 reply="Thanks for letting me know. I'm here if you want to talk more.",
                 state=state,
             )
         # Show helplines
-        lines = support_lines()
+        with stage("helplines"):
+            msgs = helpline_messages()
         state.crisis = "done"
-        msgs = [
-            "I am really glad you told me; getting support matters.",
-        ]
-        if lines:
-            msgs.append("If you want to talk to someone now, here are some options:")
-            msgs.extend(lines)
-        else:
-            msgs.append("If you want to talk to someone now, please reach out to a local helpline or emergency services.")
         return ChatOut(mode="crisis", messages=msgs, state=state)
 
-    if contains_crisis_signal(user):
+    with stage("crisis"):
+        signal = contains_crisis_signal(user)
+    if signal:
         # Ask permission to talk about it; do not show numbers yet
         state.crisis = "check"
         return ChatOut(
@@ -76,62 +134,201 @@ def chat(body: ChatIn):
             state=state,
         )
 
-    # Optional local style guide (appended to system prompt if present)
-    style_append = ""
-    try:
-        sg_path = Path(__file__).resolve().parents[2] / "content" / "style_guide_local.json"
-        if sg_path.exists():
-            sg = _json.loads(sg_path.read_text(encoding="utf-8"))
-            style_append = (sg.get("append") or "").strip()
-    except Exception:
-        style_append = ""
-
-    # Mode toggles (env)
-    import os as _os
-    plain_mode = (_os.getenv("PLAIN_ENGLISH_MODE", "true").lower() in ("1", "true", "yes"))
-    fast_mode = (_os.getenv("FAST_MODE", "true").lower() in ("1", "true", "yes"))
-    if body.fast is not None:
-        fast_mode = bool(body.fast)
+    # Mode toggles (env, read once) and per-request fast override
+    settings = prompting.SETTINGS
+    fast_mode = settings.fast_mode if body.fast is None else bool(body.fast)
 
     # Lexicon: help the model interpret Aboriginal English while replying in plain English
-    norm_user, lex_notes = normalize_for_retrieval(user)
-
-    # RAG context (approved snippets)
-    context = "" if fast_mode else retrieve_context(norm_user)
-    system = SYSTEM_PROMPT
-    if style_append and plain_mode:
-        system += "\n\nLOCAL STYLE GUIDE:\n" + style_append
-    if lex_notes:
-        system += "\n\nLEXICON NOTES (user terms):\n- " + "\n- ".join(lex_notes)
-    if context:
-        system += "\n\nAPPROVED CONTEXT:\n" + context
-    messages = [
-        {"role": "system", "content": system},
-        {"role": "user", "content": user},
-    ]
+    with stage("lexicon"):
+        norm_user, lex_notes = normalize_for_retrieval(user)
+
+    # RAG context (approved snippets); embed/search sub-stages are timed in rag.py
+    context = ""
+    if not fast_mode:
+        with stage("retrieval"):
+            context = await retrieve_context_async(norm_user)
+    # Static prompt first and unchanged across turns (Ollama reuses its KV cache); notes/context follow
+    with stage("prompt"):
+        messages = prompting.build_messages(settings.plain_english, lex_notes, context, user)
 
     max_toks = 60 if fast_mode else 90
-    reply = call_ollama_chat(messages, temperature=0.25 if fast_mode else 0.3, top_p=0.9, max_tokens=max_toks)
+    llm_kwargs = {"temperature": 0.25 if fast_mode else 0.3, "top_p": 0.9, "max_tokens": max_toks}
+    return messages, llm_kwargs, state
 
-    # Filter accidental phone numbers in normal chat (not applied in crisis mode)
-    low = (reply or "").lower()
-    if any(w in low for w in [" call ", " phone ", "000", "1800", "13 "]):
-        reply = "Here are a couple of ideas that might help right now."
+def _reply_cache(body: ChatIn, messages, llm_kwargs):
+    """(cache, key, cached reply or None); cache is None when disabled or the request opts out."""
+    cache = get_response_cache()
+    if cache is None:
+        return None, None, None
+    if body.no_cache:
+        cache.skipped()
+        return None, None, None
+    with stage("response_cache"):
+        key = response_key(messages, llm_kwargs, OLLAMA_MODEL)
+        return cache, key, cache.get(key)
 
-    return ChatOut(reply=reply, state=state)
+@app.post("/chat", response_model=ChatOut)
+async def chat(body: ChatIn):
+    """
+    Free-form chat (dev):
+    - No auto-welcome (empty input returns nothing)
+    - Crisis bypassed for development (no helpline text)
+    - Non-crisis: add RAG context and call local LLM
+    Async end to end so a slow generation holds no threadpool worker.
+    """
+    sid, state = await _resolve_session(body)
+    turn = await _prepare_turn(body, state)
+    if isinstance(turn, ChatOut):
+        return await _respond(turn, sid)
+    messages, llm_kwargs, state = turn
+
+    cache, key, reply = _reply_cache(body, messages, llm_kwargs)
+    if reply is None:
+        with stage("llm"):
+            reply = await call_ollama_chat_async(messages, **llm_kwargs)
+        # Filter accidental phone numbers in normal chat (not applied in crisis mode)
+        with stage("filter"):
+            filtered = filter_reply(reply)
+        # a filtered generation is a canned non-answer; never serve it to the next user
+        if cache is not None and filtered == reply:
+            cache.put(key, reply)
+        reply = filtered
+
+    return await _respond(ChatOut(reply=reply, state=state), sid)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {_json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(body: ChatIn):
+    """
+    Same turn as /chat, streamed as Server-Sent Events:
+    - `token`   {"text": ...}  partial reply text, already through the output filter
+    - `replace` {"text": ...}  the filter tripped; discard partial text and show this instead
+    - `done`    ChatOut        final reply + state (also the only event for crisis/empty turns)
+    """
+    sid, state = await _resolve_session(body)
+    turn = await _prepare_turn(body, state)
+    if isinstance(turn, ChatOut):
+        done = (await _respond(turn, sid)).model_dump()
+        return StreamingResponse(iter([_sse("done", done)]), media_type="text/event-stream")
+    messages, llm_kwargs, state = turn
+    cache, key, cached = _reply_cache(body, messages, llm_kwargs)
+
+    async def events():
+        if cached is not None:
+            yield _sse("token", {"text": cached})
+            yield _sse("done", (await _respond(ChatOut(reply=cached, state=state), sid)).model_dump())
+            return
+        filt = StreamingReplyFilter()
+        t0 = time.perf_counter()
+        first = True
+        try:
+            # aclosing: stop the upstream generation as soon as the filter trips
+            async with aclosing(stream_ollama_chat_async(messages, **llm_kwargs)) as pieces:
+                async for piece in pieces:
+                    if first:
+                        metrics.observe("llm_first_token", time.perf_counter() - t0)
+                        first = False
+                    text = filt.feed(piece)
+                    if text:
+                        yield _sse("token", {"text": text})
+                    if filt.blocked:
+                        yield _sse("replace", {"text": filt.reply})
+                        break
+            tail = filt.finish()
+            if tail:
+                yield _sse("token", {"text": tail})
+            reply = filt.reply
+            metrics.observe("llm", time.perf_counter() - t0)
+            if cache is not None and not filt.blocked:
+                cache.put(key, reply)
+        except Exception:
+            reply = "Sorry, I had trouble thinking just now."
+            yield _sse("replace", {"text": reply})
+        yield _sse("done", (await _respond(ChatOut(reply=reply, state=state), sid)).model_dump())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# upper bound on messages per /screen/batch request
+SCREEN_BATCH_MAX = int(os.getenv("SCREEN_BATCH_MAX", "10000") or "10000")
+
+@app.post("/screen/batch")
+def screen_messages(body: ScreenBatchIn):
+    """
+    Crisis / monitor screening for many messages at once (same tiers as the chat path).
+    Returns per-message level, trigger, span and pattern index, plus level counts.
+    """
+    if len(body.messages) > SCREEN_BATCH_MAX:
+        return JSONResponse({"error": f"at most {SCREEN_BATCH_MAX} messages per request"}, status_code=413)
+    with stage("screen"):
+        results = screen_batch(body.messages)
+    counts = {"none": 0, "monitor": 0, "crisis": 0}
+    for r in results:
+        counts[r.level] += 1
+    return JSONResponse({
+        "results": [
+            {"level": r.level, "trigger": r.trigger, "span": list(r.span) if r.span else None, "pattern": r.pattern}
+            for r in results
+        ],
+        "counts": counts,
+    })
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Stage and request latency histograms in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/debug/model")
 def debug_model():
-    import http.client, json
-    from .ai_gateway import OLLAMA_HOST, OLLAMA_PORT, OLLAMA_MODEL
+    from .ai_gateway import OLLAMA_MODEL
     try:
-        conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=3)
-        conn.request("GET", "/api/tags")
-        resp = conn.getresponse()
-        tags = json.loads(resp.read().decode("utf-8", errors="ignore"))
-        conn.close()
+        _, raw = ollama_pool().request("GET", "/api/tags", timeout=3)
+        tags = _json.loads(raw.decode("utf-8", errors="ignore"))
         available = any(t.get("model") == OLLAMA_MODEL for t in tags.get("models", []))
         return JSONResponse({"configured": OLLAMA_MODEL, "available": available, "tags": tags})
     except Exception as e:
         return JSONResponse({"configured": OLLAMA_MODEL, "available": False, "error": str(e)}, status_code=503)
 
+@app.get("/debug/llm")
+def debug_llm():
+    """Ollama prompt-eval vs eval timings (last call + averages); a low prompt_eval_count means the prefix cache hit."""
+    return JSONResponse(LLM_TIMINGS.stats())
+
+@app.get("/debug/pool")
+def debug_pool():
+    """Keep-alive pool counters (created / reused / reuse_rate) per Ollama host."""
+    return JSONResponse(pool_stats())
+
+@app.get("/debug/embed-cache")
+def debug_embed_cache():
+    """On-disk embedding cache counters (hits / misses / evictions / hit_rate)."""
+    cache = get_cache()
+    return JSONResponse(cache.stats() if cache is not None else {"enabled": False})
+
+@app.get("/debug/response-cache")
+def debug_response_cache():
+    """Reply cache counters (hits / misses / hit_rate / evictions / skipped)."""
+    cache = get_response_cache()
+    return JSONResponse(cache.stats() if cache is not None else {"enabled": False})
+
+@app.get("/debug/sessions")
+def debug_sessions():
+    """Session store counters (entries / hits / evictions / expirations); no session contents."""
+    store = get_store()
+    return JSONResponse(store.stats() if store else {"enabled": False})
+
+@app.get("/debug/crisis-events")
+def debug_crisis_events():
+    """Crisis event log counters (emitted / written / dropped / batches); no event contents."""
+    log = get_event_log()
+    return JSONResponse(log.stats() if log else {"enabled": False})
+
+@app.get("/debug/content")
+def debug_content():
+    """Loaded content snapshots (version / sha256 prefix / present) per file under content/."""
+    return JSONResponse(CONTENT.status())
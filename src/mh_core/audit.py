@@ -21,34 +21,36 @@ from dataclasses import dataclass
 import re
 
 # Import ONLY the public function; no circular deps
-from .safety import assess_message
+from .safety import screen_batch
+from .phrases import PhraseMatcher
 
 # ------------ helpers
 
 def _norm(s: str) -> str:
     return (s or "").strip().lower()
 
+WORRY_WORDS = [
+    "stress", "stressed", "anxious", "anxiety", "panic", "sad", "depress", "low",
+    "angry", "anger", "overwhelm", "worried", "worry", "scared", "fear",
+    "tired", "exhausted", "burnt out", "burned out", "lonely",
+    "sleep", "insomnia", "problem", "issue", "help", "advice",
+    "exam", "assignment", "money", "bills", "rent", "job", "work"
+]
+PEOPLE_WORDS = [
+    "family","elder","elders","friend","friends","mate","mates","mum","mom","dad",
+    "mother","father","nan","pop","grandma","grandpa","aunty","uncle","cousin","cousins",
+    "brother","sister","siblings","partner","boyfriend","girlfriend","husband","wife",
+    "kids","children","child","son","daughter","mob","community","coach","teacher",
+    "counsellor","counselor","worker"
+]
+# One automaton for both keyword lists, built at import
+_SIGNALS = PhraseMatcher({"worry": WORRY_WORDS, "people": PEOPLE_WORDS})
+
 def _is_worry_signal(text: str) -> bool:
-    t = _norm(text)
-    WORRY_WORDS = [
-        "stress", "stressed", "anxious", "anxiety", "panic", "sad", "depress", "low",
-        "angry", "anger", "overwhelm", "worried", "worry", "scared", "fear",
-        "tired", "exhausted", "burnt out", "burned out", "lonely",
-        "sleep", "insomnia", "problem", "issue", "help", "advice",
-        "exam", "assignment", "money", "bills", "rent", "job", "work"
-    ]
-    return any(w in t for w in WORRY_WORDS)
+    return _SIGNALS.has(_norm(text), "worry")
 
 def _looks_like_people_answer(text: str) -> bool:
-    t = _norm(text)
-    PEOPLE = [
-        "family","elder","elders","friend","friends","mate","mates","mum","mom","dad",
-        "mother","father","nan","pop","grandma","grandpa","aunty","uncle","cousin","cousins",
-        "brother","sister","siblings","partner","boyfriend","girlfriend","husband","wife",
-        "kids","children","child","son","daughter","mob","community","coach","teacher",
-        "counsellor","counselor","worker"
-    ]
-    return any(p in t for p in PEOPLE)
+    return _SIGNALS.has(_norm(text), "people")
 
 def _step_from_bot_text(text: str) -> int:
     """Heuristic to guess which Stay Strong step a bot message belongs to."""
@@ -88,23 +90,22 @@ def audit_conversation(messages: List[Dict[str, str]]) -> Dict:
         return {"ok": False, "error": "messages must be a list of {role, text}"}
 
     # 1) Crisis/safety signal scanning (generic — uses your local patterns)
-    for m in messages:
-        if m.get("role") == "user":
-            sr = assess_message(m.get("text", ""))
-            if sr.level == "crisis":
-                issues.append(Issue(
-                    "safety", "critical",
-                    "Potential crisis signal detected in a user message.",
-                    "Ensure the bot enters crisis mode: ask about immediate danger, encourage contacting 000/Lifeline, invite a trusted person to sit with them, and keep messages short and calm.",
-                    example=m.get("text", "")
-                ))
-            elif sr.level == "monitor":
-                issues.append(Issue(
-                    "safety", "medium",
-                    "Passive ideation signal detected (monitoring tier).",
-                    "Acknowledge feelings and ask gentle follow-ups; offer strengths-based resources and helpline info if appropriate.",
-                    example=m.get("text", "")
-                ))
+    user_msgs = [m for m in messages if m.get("role") == "user"]
+    for m, sr in zip(user_msgs, screen_batch([m.get("text", "") for m in user_msgs])):
+        if sr.level == "crisis":
+            issues.append(Issue(
+                "safety", "critical",
+                "Potential crisis signal detected in a user message.",
+                "Ensure the bot enters crisis mode: ask about immediate danger, encourage contacting 000/Lifeline, invite a trusted person to sit with them, and keep messages short and calm.",
+                example=m.get("text", "")
+            ))
+        elif sr.level == "monitor":
+            issues.append(Issue(
+                "safety", "medium",
+                "Passive ideation signal detected (monitoring tier).",
+                "Acknowledge feelings and ask gentle follow-ups; offer strengths-based resources and helpline info if appropriate.",
+                example=m.get("text", "")
+            ))
 
     # 2) Early-turn branching: did the user share a worry but the bot pushed straight to Step 1 without acknowledgement?
     # We look at the first user+bot pair.
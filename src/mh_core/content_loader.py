@@ -1,25 +1,190 @@
 # src/mh_core/content_loader.py
-from pathlib import Path
+"""
+Content registry: every editable file under content/ (language pack, crisis
+contacts and local patterns, cultural lexicon, style guide) is parsed once into
+an immutable snapshot and swapped in atomically when the file changes.
+
+    CONTENT.watch("style_guide_local.json", parse=..., default="")  # at import
+    CONTENT.get("style_guide_local.json")                           # hot path
+
+get() is a dict lookup plus an attribute read: no stat, no read. A daemon
+thread polls the watched files every CONTENT_RELOAD_SECS (default 2; 0 turns
+live reload off) and re-parses a file only when its mtime/size changed *and*
+its sha256 differs, so touching a file or rewriting identical bytes keeps the
+current snapshot (and everything derived from its `version`).
+"""
+from __future__ import annotations
+
+import hashlib
 import json
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional
+
+CONTENT_DIR = Path(__file__).resolve().parents[2] / "content"
+CONTENT_PATH = CONTENT_DIR / "en_aus_pack.json"
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of parsed JSON: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class WatchedFile:
+    """
+    Parsed view of a content file that is re-read only when it changes.
+    get() checks the file at most every `check_every` seconds (float("inf") =
+    only on first use; a ContentRegistry then calls refresh() from its own
+    thread). Missing or unparseable files yield `default`. `version` increases
+    each time a new value is loaded, so callers can cache things derived from
+    it (compiled regexes, formatted text).
+    """
+
+    def __init__(self, path, parse=None, default=None, check_every: float = 2.0):
+        self.path = Path(path)
+        self.parse = parse or (lambda text: json.loads(text))
+        self.default = default
+        self.check_every = check_every
+        self.version = 0
+        self.digest: Optional[str] = None  # sha256 of the loaded bytes
+        self._value = default
+        self._stamp = None  # (mtime_ns, size)
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_every:
+            with self._lock:
+                if now - self._checked_at >= self.check_every:
+                    self._refresh()
+                    self._checked_at = now
+        return self._value
+
+    def refresh(self) -> bool:
+        """Check the file now; True if a new value was swapped in."""
+        with self._lock:
+            before = self.version
+            self._refresh()
+            self._checked_at = time.monotonic()
+            return self.version != before
+
+    def _refresh(self) -> None:
+        try:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp and self.version:
+            return
+        self._stamp = stamp
+        raw = None
+        if stamp is not None:
+            try:
+                raw = self.path.read_bytes()
+            except OSError:
+                raw = None
+        digest = hashlib.sha256(raw).hexdigest() if raw is not None else None
+        if digest == self.digest and self.version:
+            return  # touched or rewritten with the same bytes
+        value = self.default
+        if raw is not None:
+            try:
+                value = self.parse(raw.decode("utf-8-sig"))
+            except Exception:
+                value = self.default
+        # one assignment each; readers see either the old or the new snapshot
+        self._value = value
+        self.digest = digest
+        self.version += 1
+
+
+class ContentRegistry:
+    """All watched content files, refreshed together by one background poller."""
+
+    def __init__(self, root: Path = CONTENT_DIR, reload_every: float = 2.0):
+        self.root = Path(root)
+        self.reload_every = reload_every
+        self._files: Dict[str, WatchedFile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def watch(self, name: str, parse: Optional[Callable[[str], Any]] = None,
+              default: Any = None) -> WatchedFile:
+        """Register content/<name> (idempotent; the first registration's parser wins)."""
+        with self._lock:
+            wf = self._files.get(name)
+            if wf is None:
+                parser = parse or json.loads
+                wf = WatchedFile(self.root / name, parse=lambda text: freeze(parser(text)),
+                                 default=freeze(default), check_every=float("inf"))
+                self._files[name] = wf
+                if self.reload_every > 0:
+                    self._start()
+        return wf
+
+    def get(self, name: str) -> Any:
+        return self._files[name].get()
+
+    def refresh(self) -> List[str]:
+        """Check every watched file once; returns the names that changed."""
+        with self._lock:
+            files = list(self._files.items())
+        return [name for name, wf in files if wf.refresh()]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            files = list(self._files.items())
+        return {
+            name: {"version": wf.version, "sha256": (wf.digest or "")[:12], "present": wf.digest is not None}
+            for name, wf in sorted(files)
+        }
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll, name="content-reload", daemon=True)
+            self._thread.start()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.reload_every):
+            try:
+                self.refresh()
+            except Exception:
+                pass  # keep serving the last good snapshots
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+CONTENT = ContentRegistry(CONTENT_DIR, float(os.getenv("CONTENT_RELOAD_SECS", "2") or "0"))
+
+# ---------- language pack (content/en_aus_pack.json)
+_PACK = CONTENT.watch(CONTENT_PATH.name, default={})
+
+
+def pack():
+    return _PACK.get()
+
+
+def strings():
+    return pack().get("strings") or MappingProxyType({})
+
+
+def examples():
+    return pack().get("examples") or MappingProxyType({})
+
 
-# This file loads your editable content pack at: content/en_aus_pack.json
-# Project layout assumed:
-#   mh-chatbot/
-#     ├─ content/en_aus_pack.json
-#     └─ src/mh_core/content_loader.py
-
-# Resolve path to the project root, then to content/en_aus_pack.json
-CONTENT_PATH = Path(__file__).resolve().parents[2] / "content" / "en_aus_pack.json"
-
-def _load_pack():
-    if not CONTENT_PATH.exists():
-        raise FileNotFoundError(
-            f"Content pack not found at {CONTENT_PATH}. "
-            "Make sure the file exists and the path is correct."
-        )
-    with open(CONTENT_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-PACK = _load_pack()
-STRINGS = PACK.get("strings", {})
-EXAMPLES = PACK.get("examples", {})
+def __getattr__(name: str):
+    # PACK / STRINGS / EXAMPLES used to be import-time constants; keep them as live views
+    views = {"PACK": pack, "STRINGS": strings, "EXAMPLES": examples}
+    if name in views:
+        return views[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
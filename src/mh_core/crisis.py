@@ -3,15 +3,18 @@ Crisis detection and support helpers.
 
 Behaviour:
 - If DEV_BYPASS_CRISIS=true, detection is disabled and functions no-op.
-- Otherwise uses regex patterns to detect crisis terms and can format
-  helpline numbers from content/crisis_contacts_au.json.
+- Otherwise uses regex patterns to detect crisis terms and serves
+  helpline numbers from content/crisis_contacts_<region>.json
+  (HELPLINE_REGION, default au), prebuilt and kept in memory.
 """
 import os
 import re
-import sys
-import json
-from datetime import datetime
-from pathlib import Path
+from collections.abc import Mapping
+
+from .content_loader import CONTENT
+from .events import get_event_log
+from .phrases import PhraseMatcher
+from .safety import DEFAULT_CONTACTS
 
 # Default to enabled in production; can opt-out via env
 _DEV_BYPASS = os.getenv("DEV_BYPASS_CRISIS", "false").lower() in ("1", "true", "yes")
@@ -23,7 +26,8 @@ _CRISIS_TERMS = [
     r"\bno reason to live\b", r"\bself[- ]?harm\b", r"\bhurt myself\b",
     r"\bnot safe\b", r"\bcan'?t stay safe\b", r"\bgive up\b"
 ]
-_CRISIS_RE = re.compile("|".join(_CRISIS_TERMS), re.IGNORECASE)
+# one named group per term, so a match also tells us which pattern fired (p0, p1, ...)
+_CRISIS_RE = re.compile("|".join(f"(?P<p{i}>{t})" for i, t in enumerate(_CRISIS_TERMS)), re.IGNORECASE)
 
 def contains_crisis_signal(text: str) -> bool:
     """Return False in dev mode; otherwise regex-detect common crisis terms."""
@@ -33,62 +37,112 @@ def contains_crisis_signal(text: str) -> bool:
         return False
     match = _CRISIS_RE.search(text)
     if match:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[CRISIS DETECTED] {timestamp} | User said: \"{text}\"", file=sys.stderr)
+        # queued for the background writer; pattern id only, never the user's text
+        log = get_event_log()
+        if log is not None:
+            log.emit("crisis_detected", pattern=f"crisis.{match.lastgroup}")
         return True
     return False
 
-def support_lines() -> list[str]:
-    """Return helpline lines for display. Empty if bypassing or file missing."""
+# Helpline block shown in the crisis flow, prebuilt per (region, locale) and
+# rebuilt only when the region's contacts snapshot changes (content registry),
+# so entering the crisis flow never waits on disk or string formatting.
+HELPLINE_REGION = os.getenv("HELPLINE_REGION", "au").lower()
+HELPLINE_LOCALE = os.getenv("HELPLINE_LOCALE", "en").lower()
+
+# locale -> ((label, contacts key), ...) in display order
+_HELPLINE_LABELS = {
+    "en": (
+        ("Emergency", "emergency"),
+        ("Emergency (mobile)", "emergency_mobile"),
+        ("13YARN", "13yarn"),
+        ("Lifeline", "lifeline"),
+        ("Kids Helpline", "kids_helpline"),
+        ("Suicide Call Back", "suicide_callback"),
+        ("Beyond Blue", "beyond_blue"),
+    ),
+}
+_HELPLINE_TEXT = {
+    "en": {
+        "opening": "I am really glad you told me; getting support matters.",
+        "intro": "If you want to talk to someone now, here are some options:",
+        "none": "If you want to talk to someone now, please reach out to a local helpline or emergency services.",
+    },
+}
+
+_BLOCKS: dict = {}  # (region, locale) -> (contacts version, lines, messages)
+
+def _contacts_file(region: str):
+    return CONTENT.watch(f"crisis_contacts_{region}.json", default=None)
+
+def _region_contacts(region: str):
+    """(version, contacts) for the region; built-in safety defaults when the file is missing or invalid."""
+    wf = _contacts_file(region)
+    data = wf.get()
+    if isinstance(data, Mapping):
+        return wf.version, data
+    return wf.version, DEFAULT_CONTACTS
+
+def _build_block(region: str, locale: str):
+    version, contacts = _region_contacts(region)
+    labels = _HELPLINE_LABELS.get(locale, _HELPLINE_LABELS["en"])
+    text = _HELPLINE_TEXT.get(locale, _HELPLINE_TEXT["en"])
+    lines = tuple(f"- {label}: {contacts[key]}" for label, key in labels if contacts.get(key))
+    if lines:
+        messages = (text["opening"], text["intro"]) + lines
+    else:
+        messages = (text["opening"], text["none"])
+    return version, lines, messages
+
+def _block(region=None, locale=None):
+    region = (region or HELPLINE_REGION).lower()
+    locale = (locale or HELPLINE_LOCALE).lower()
+    key = (region, locale)
+    cached = _BLOCKS.get(key)
+    if cached is None or cached[0] != _contacts_file(region).version:
+        cached = _BLOCKS[key] = _build_block(region, locale)
+    return cached
+
+def support_lines(region=None, locale=None) -> list[str]:
+    """Return helpline lines for display (empty if bypassing). Served from the prebuilt block."""
     if _DEV_BYPASS:
         return []
-    try:
-        root = Path(__file__).resolve().parents[2]
-        path = root / "content" / "crisis_contacts_au.json"
-        if not path.exists():
-            return []
-        data = json.loads(path.read_text(encoding="utf-8"))
-        # Keep a friendly, short list
-        mapping = {
-            "Emergency": data.get("emergency"),
-            "Emergency (mobile)": data.get("emergency_mobile"),
-            "13YARN": data.get("13yarn"),
-            "Lifeline": data.get("lifeline"),
-            "Kids Helpline": data.get("kids_helpline"),
-            "Suicide Call Back": data.get("suicide_callback"),
-            "Beyond Blue": data.get("beyond_blue"),
-        }
-        lines = []
-        for label, num in mapping.items():
-            if num:
-                lines.append(f"- {label}: {num}")
-        return lines
-    except Exception:
-        return []
+    return list(_block(region, locale)[1])
+
+def helpline_messages(region=None, locale=None) -> list[str]:
+    """Full crisis-flow message list: opening line, intro and helplines (or a generic pointer)."""
+    if _DEV_BYPASS:
+        text = _HELPLINE_TEXT.get((locale or HELPLINE_LOCALE).lower(), _HELPLINE_TEXT["en"])
+        return [text["opening"], text["none"]]
+    return list(_block(region, locale)[2])
+
+if not _DEV_BYPASS:
+    _block()  # warm the default region so the first crisis turn is served from memory
+
+# Phrases for looks_okay_response; matched in one pass by _OKAY_MATCHER
+_OKAY_POSITIVE = [
+    "i'm okay", "im okay", "i am okay", "i'm ok", "im ok", "i am ok",
+    "i'm fine", "im fine", "fine", "okay", "ok",
+    "all good", "allgood", "doing good", "good now", "feeling good",
+    "better now", "feeling better", "bit better", "im better", "i'm better",
+    "sorted", "no worries", "no worry", "no wori",
+    "safe now", "i'm safe", "im safe", "i am safe",
+    "not now", "not really", "no thanks", "no thank you", "nah", "no",
+    "maybe later", "later", "another time", "not needed", "no need",
+]
+_OKAY_NEGATIVE = [
+    "not safe", "unsafe", "can't stay safe", "cant stay safe",
+    "still struggling", "struggling", "worse", "really bad", "not okay", "not ok",
+    "hurt myself", "self-harm", "suicide", "end it", "end my life",
+    "want to die", "want to end it", "kill myself", "kill me",
+    "need help", "please help",
+]
+_OKAY_MATCHER = PhraseMatcher({"positive": _OKAY_POSITIVE, "negative": _OKAY_NEGATIVE})
 
 def looks_okay_response(text: str) -> bool:
     """Heuristic to detect if user indicates they are okay/safe and not seeking help now."""
     if not text:
         return False
-    low = text.strip().lower()
-    positive = [
-        "i'm okay", "im okay", "i am okay", "i'm ok", "im ok", "i am ok",
-        "i'm fine", "im fine", "fine", "okay", "ok",
-        "all good", "allgood", "doing good", "good now", "feeling good",
-        "better now", "feeling better", "bit better", "im better", "i'm better",
-        "sorted", "no worries", "no worry", "no wori",
-        "safe now", "i'm safe", "im safe", "i am safe",
-        "not now", "not really", "no thanks", "no thank you", "nah", "no",
-        "maybe later", "later", "another time", "not needed", "no need",
-    ]
-    negatives = [
-        "not safe", "unsafe", "can't stay safe", "cant stay safe",
-        "still struggling", "struggling", "worse", "really bad", "not okay", "not ok",
-        "hurt myself", "self-harm", "suicide", "end it", "end my life",
-        "want to die", "want to end it", "kill myself", "kill me",
-        "need help", "please help",
-    ]
+    found = _OKAY_MATCHER.categories(text.strip())
     # If positive signals present and no strong negatives, treat as okay
-    if any(p in low for p in positive) and not any(n in low for n in negatives):
-        return True
-    return False
+    return "positive" in found and "negative" not in found
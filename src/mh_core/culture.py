@@ -1,52 +1,80 @@
 from __future__ import annotations
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from pathlib import Path
 import json
 
+from .content_loader import CONTENT
+from .phrases import PhraseMatcher
+
 _LEX_PATH = Path(__file__).resolve().parents[2] / "content" / "cultural_lexicon.json"
-_TERMS: List[Tuple[str, str]] = []
-
-def _load_terms() -> List[Tuple[str, str]]:
-    global _TERMS
-    if _TERMS:
-        return _TERMS
-    try:
-        data = json.loads(_LEX_PATH.read_text(encoding="utf-8"))
-        pairs = []
-        for t in data.get("terms", []):
+
+
+class Lexicon:
+    """
+    Compiled cultural lexicon: one case-insensitive, whole-word matcher over
+    every phrase, so a turn is normalised in a single pass however many terms
+    (and language groups) the lexicon holds.
+
+    cultural_lexicon.json: {"terms": [{"phrase", "meaning", "group"?}, ...]}
+    "group" (e.g. a language or region) is optional; when a phrase appears in
+    several groups the first listed wins.
+    """
+
+    def __init__(self, terms: List[Dict[str, str]]):
+        self.meanings: Dict[str, Tuple[str, str]] = {}  # lower phrase -> (phrase, meaning)
+        groups: Dict[str, List[str]] = {}
+        for t in terms:
             p = t.get("phrase"); m = t.get("meaning")
-            if isinstance(p, str) and isinstance(m, str) and p:
-                pairs.append((p, m))
-        # sort by phrase length desc so multi-word terms replace first
-        pairs.sort(key=lambda x: len(x[0]), reverse=True)
-        _TERMS = pairs
-    except Exception:
-        _TERMS = []
-    return _TERMS
+            if isinstance(p, str) and isinstance(m, str) and p.strip():
+                key = p.strip().lower()
+                if key not in self.meanings:
+                    self.meanings[key] = (p.strip(), m)
+                    groups.setdefault(str(t.get("group") or "general"), []).append(key)
+        self.matcher = PhraseMatcher(groups)
+
+    def __len__(self) -> int:
+        return len(self.meanings)
+
+    def normalize(self, text: str) -> Tuple[str, List[str]]:
+        matches = self.matcher.find_longest(text)
+        if not matches:
+            return text, []
+        parts: List[str] = []
+        notes: List[str] = []
+        seen = set()
+        pos = 0
+        for m in matches:
+            phrase, meaning = self.meanings[m.phrase]
+            parts.append(text[pos:m.start])
+            parts.append(meaning)
+            pos = m.end
+            if m.phrase not in seen:
+                seen.add(m.phrase)
+                notes.append(f"{phrase} -> {meaning}")
+        parts.append(text[pos:])
+        return "".join(parts), notes
+
+
+def _parse_lexicon(text: str) -> Lexicon:
+    return Lexicon(json.loads(text).get("terms", []))
+
+
+# parsed and compiled once per file version by the content registry
+_LEXICON = CONTENT.watch(_LEX_PATH.name, parse=_parse_lexicon, default=Lexicon([]))
+
+def get_lexicon() -> Lexicon:
+    return _LEXICON.get()
 
 
 def normalize_for_retrieval(text: str) -> Tuple[str, List[str]]:
     """
     Returns a (normalized_text, notes) tuple.
     - normalized_text: original text with Aboriginal English terms replaced by plain-English meanings
-      for retrieval purposes (case-insensitive, basic word-boundary matching where possible).
-    - notes: short bullet strings like "yarn -> talk or have a conversation" to help the model interpret terms.
+      for retrieval purposes (case-insensitive, whole words only, longest phrase wins).
+    - notes: short bullet strings like "yarn -> talk or have a conversation" to help the model
+      interpret terms, in order of first appearance.
     """
     s = text or ""
     if not s:
         return s, []
-    terms = _load_terms()
-    low = s.lower()
-    notes: List[str] = []
-    out = s
-    # simple case-insensitive replace; handle word-ish boundaries for single words
-    for phrase, meaning in terms:
-        pl = phrase.lower()
-        if pl in low:
-            notes.append(f"{phrase} -> {meaning}")
-            # naive replace ignoring punctuation; keep it simple and safe
-            out = out.replace(phrase, meaning)
-            out = out.replace(phrase.lower(), meaning)
-            out = out.replace(phrase.title(), meaning)
-    return out, notes
-
+    return get_lexicon().normalize(s)
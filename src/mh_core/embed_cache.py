@@ -0,0 +1,171 @@
+# src/mh_core/embed_cache.py
+"""
+Persistent embedding cache (SQLite) shared by the query path and the index builder.
+
+Rows are keyed by sha256(model + text), so a restart, another uvicorn worker or
+the next `build_index.py` run reuses every embedding already computed. The file
+uses WAL mode so several processes can read while one writes.
+
+Settings (env):
+- EMBED_CACHE_PATH         database file (default content/cache/embeddings.sqlite3;
+                           set to "off" to disable)
+- EMBED_CACHE_MAX_ENTRIES  size bound; least recently used rows are evicted (default 50000)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_PATH = Path(__file__).resolve().parents[2] / "content" / "cache" / "embeddings.sqlite3"
+
+# last_used is refreshed at most this often per row, so hits rarely write
+_TOUCH_AFTER_SECS = 60.0
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path, max_entries: int = 50000):
+        self.path = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL,"
+            " vec BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        # upper bound on rows (replaces count as inserts); COUNT(*) runs only when it passes the limit
+        self._rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    # ---------- reads
+    def get(self, model: str, text: str, dim: Optional[int] = None) -> Optional[np.ndarray]:
+        return self.get_many(model, [text], dim).get(text)
+
+    def get_many(self, model: str, texts: Iterable[str], dim: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Cached vectors for any of `texts` (missing ones are simply absent).
+        With `dim`, rows of another width (e.g. written by a different server
+        under the same model name) count as misses and get overwritten.
+        """
+        texts = list(dict.fromkeys(texts))
+        keys = {cache_key(model, t): t for t in texts}
+        found: Dict[str, np.ndarray] = {}
+        stale: List[str] = []
+        now = time.time()
+        with self._lock:
+            items = list(keys.items())
+            for start in range(0, len(items), 500):
+                chunk = items[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, dim, vec, last_used FROM embeddings WHERE key IN ({marks})", [k for k, _ in chunk]
+                ).fetchall()
+                for key, row_dim, blob, last_used in rows:
+                    if dim is not None and row_dim != dim:
+                        continue
+                    found[keys[key]] = np.frombuffer(blob, dtype=np.float32).copy()
+                    if now - last_used > _TOUCH_AFTER_SECS:
+                        stale.append(key)
+            if stale:
+                self._db.executemany("UPDATE embeddings SET last_used=? WHERE key=?", [(now, k) for k in stale])
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(texts) - len(found)
+        return found
+
+    # ---------- writes
+    def put(self, model: str, text: str, vec: np.ndarray) -> None:
+        self.put_many(model, {text: vec})
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        if not vectors:
+            return
+        now = time.time()
+        rows = []
+        for text, vec in vectors.items():
+            v = np.asarray(vec, dtype=np.float32)
+            rows.append((cache_key(model, text), model, int(v.shape[0]), v.tobytes(), now))
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings(key, model, dim, vec, last_used) VALUES (?,?,?,?,?)", rows
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")  # never leave the shared connection inside a transaction
+                raise
+            self._stats["writes"] += len(rows)
+            self._rows += len(rows)
+            if self._rows > self.max_entries:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._rows = count
+        if count <= self.max_entries:
+            return
+        # trim to 90% so eviction does not run on every insert at the bound
+        drop = count - int(self.max_entries * 0.9)
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (drop,)
+        )
+        self._stats["evictions"] += drop
+        self._rows = count - drop
+
+    # ---------- introspection
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        out["entries"] = len(self)
+        out["max_entries"] = self.max_entries
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_CACHE: Optional[EmbeddingCache] = None
+_CACHE_DISABLED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache from env settings, or None when disabled or unavailable."""
+    global _CACHE, _CACHE_DISABLED
+    if _CACHE is None and not _CACHE_DISABLED:
+        with _CACHE_LOCK:
+            if _CACHE is None and not _CACHE_DISABLED:
+                raw = os.getenv("EMBED_CACHE_PATH", "")
+                try:
+                    if raw.lower() in ("off", "none", "false", "0"):
+                        raise OSError("embedding cache disabled")
+                    _CACHE = EmbeddingCache(
+                        Path(raw) if raw else DEFAULT_PATH,
+                        max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "50000") or "50000"),
+                    )
+                except (OSError, sqlite3.Error):
+                    # read-only checkout or disabled: run without the disk tier
+                    _CACHE_DISABLED = True
+    return _CACHE
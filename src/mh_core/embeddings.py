@@ -0,0 +1,243 @@
+# src/mh_core/embeddings.py
+"""
+Embedding backends and bulk embedding for index builds.
+
+Backends (EMBED_BACKEND):
+- ollama   the Ollama embedding model EMBED_MODEL (default)
+- hashing  HashingEmbedder: signed hashed character n-grams, deterministic,
+           no model server, well under a millisecond per query. Lower quality
+           than a neural model, but good enough for degraded retrieval,
+           offline index builds and benchmarks.
+
+A backend's `name` identifies its vector space: it keys the embedding cache
+and is recorded as the index manifest's model, so switching backend forces a
+full rebuild instead of mixing incompatible vectors.
+
+embed_many() splits texts into batches, sends each batch as one request to
+Ollama's multi-input /api/embed endpoint ({"input": [...]} -> {"embeddings": [...]}),
+runs up to `workers` batches at once over the shared connection pool, and
+retries failed batches with exponential backoff. Servers without /api/embed
+(older Ollama, 404) fall back to one /api/embeddings call per text.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from .http_pool import async_ollama_client, ollama_pool
+
+# progress(done_texts, total_texts, elapsed_seconds)
+ProgressFn = Callable[[int, int, float], None]
+
+
+class EmbedError(RuntimeError):
+    """Raised when a batch still fails after all retries."""
+
+
+def _post(path: str, payload: dict, timeout: float):
+    return ollama_pool().request(
+        "POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"}, timeout=timeout
+    )
+
+
+def embed_batch(texts: Sequence[str], model: str, timeout: float = 60) -> List[np.ndarray]:
+    """Embed one batch in a single request; raises EmbedError on a bad response."""
+    status, raw = _post("/api/embed", {"model": model, "input": list(texts)}, timeout)
+    if status == 404:
+        return [_embed_legacy(t, model, timeout) for t in texts]
+    if status != 200:
+        raise EmbedError(f"/api/embed returned HTTP {status}: {raw[:200]!r}")
+    try:
+        rows = json.loads(raw.decode("utf-8", errors="ignore"))["embeddings"]
+    except (ValueError, KeyError, TypeError):
+        raise EmbedError(f"Unexpected /api/embed response: {raw[:200]!r}")
+    if not isinstance(rows, list) or len(rows) != len(texts):
+        raise EmbedError(f"/api/embed returned {len(rows) if isinstance(rows, list) else 'no'} vectors for {len(texts)} inputs")
+    return [np.asarray(r, dtype=np.float32) for r in rows]
+
+
+def _embed_legacy(text: str, model: str, timeout: float) -> np.ndarray:
+    status, raw = _post("/api/embeddings", {"model": model, "prompt": text, "input": text}, timeout)
+    try:
+        obj = json.loads(raw.decode("utf-8", errors="ignore"))
+    except ValueError:
+        obj = {}
+    if status == 200 and isinstance(obj.get("embedding"), list) and obj["embedding"]:
+        return np.asarray(obj["embedding"], dtype=np.float32)
+    if status == 200 and isinstance(obj.get("embeddings"), list) and obj["embeddings"]:
+        return np.asarray(obj["embeddings"][0], dtype=np.float32)
+    raise EmbedError(f"Unexpected /api/embeddings response (HTTP {status}): {raw[:200]!r}")
+
+
+def _with_retries(fn, retries: int, backoff: float):
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= retries:
+                raise EmbedError(f"giving up after {attempt + 1} attempts: {exc}") from exc
+            time.sleep(backoff * (2 ** attempt))
+            attempt += 1
+
+
+def embed_many(
+    texts: Sequence[str],
+    model: str,
+    batch_size: int = 32,
+    workers: int = 4,
+    retries: int = 3,
+    backoff: float = 0.5,
+    timeout: float = 60,
+    progress: Optional[ProgressFn] = None,
+) -> List[np.ndarray]:
+    """Embed all texts (order preserved) using batched, concurrent requests."""
+    texts = list(texts)
+    if not texts:
+        return []
+    batch_size = max(1, int(batch_size))
+    batches = [(start, texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+    out: List[Optional[np.ndarray]] = [None] * len(texts)
+    done = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+        futures = {
+            ex.submit(_with_retries, lambda b=batch: embed_batch(b, model, timeout), retries, backoff): start
+            for start, batch in batches
+        }
+        for fut in as_completed(futures):
+            start = futures[fut]
+            try:
+                vecs = fut.result()
+            except Exception:
+                for other in futures:
+                    other.cancel()  # don't start batches we will throw away
+                raise
+            out[start:start + len(vecs)] = vecs
+            done += len(vecs)
+            if progress:
+                progress(done, len(texts), time.perf_counter() - t0)
+    return out  # type: ignore[return-value]
+
+
+def parse_embedding(raw: bytes) -> np.ndarray:
+    """Vector from an /api/embeddings or /api/embed body ('embedding' or 'embeddings' key)."""
+    try:
+        obj = json.loads(raw.decode("utf-8", errors="ignore"))
+    except ValueError:
+        obj = None
+    if isinstance(obj, dict):
+        if isinstance(obj.get("embedding"), list) and obj["embedding"]:
+            return np.asarray(obj["embedding"], dtype=np.float32)
+        if isinstance(obj.get("embeddings"), list) and obj["embeddings"]:
+            return np.asarray(obj["embeddings"][0], dtype=np.float32)
+    raise EmbedError(f"Embedding response has no vector: {raw[:200]!r}")
+
+
+# ---------- backends
+class Embedder(ABC):
+    """Embedding backend. Vectors are returned as float32, not necessarily unit length."""
+
+    name = "embedder"
+    cacheable = True  # worth keeping in the on-disk embedding cache
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str], progress: Optional[ProgressFn] = None) -> List[np.ndarray]:
+        ...
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    async def embed_query_async(self, text: str) -> np.ndarray:
+        return self.embed_query(text)
+
+
+class OllamaEmbedder(Embedder):
+    def __init__(self, model: str, batch_size: int = 32, workers: int = 4, retries: int = 3, timeout: float = 15):
+        self.name = model  # plain model name: caches and manifests from earlier builds stay valid
+        self.model = model
+        self.batch_size = batch_size
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+
+    def embed(self, texts: Sequence[str], progress: Optional[ProgressFn] = None) -> List[np.ndarray]:
+        return embed_many(texts, self.model, batch_size=self.batch_size, workers=self.workers,
+                          retries=self.retries, timeout=self.timeout, progress=progress)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        _, raw = _post("/api/embeddings", {"model": self.model, "input": text}, self.timeout)
+        return parse_embedding(raw)
+
+    async def embed_query_async(self, text: str) -> np.ndarray:
+        resp = await async_ollama_client().post(
+            "/api/embeddings", json={"model": self.model, "input": text}, timeout=self.timeout
+        )
+        return parse_embedding(resp.content)
+
+
+_SPACE_RE = re.compile(r"\s+")
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Character n-grams (of " text ", lowercased) hashed into `dim` signed buckets.
+    The hash is a polynomial over the UTF-8 bytes computed with NumPy, so the
+    result is identical across processes and platforms (unlike hash()).
+    """
+
+    def __init__(self, dim: int = 512, ngrams: Sequence[int] = (3, 4, 5)):
+        self.dim = int(dim)
+        self.ngrams = tuple(int(n) for n in ngrams)
+        self.name = f"hashing-{self.dim}-{'.'.join(map(str, self.ngrams))}"
+        self.cacheable = False  # recomputing is cheaper than a cache lookup
+
+    def _vector(self, text: str) -> np.ndarray:
+        norm = " " + _SPACE_RE.sub(" ", (text or "").lower().replace("’", "'")).strip() + " "
+        data = np.frombuffer(norm.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        v = np.zeros(self.dim, dtype=np.float64)
+        for n in self.ngrams:
+            if data.size < n:
+                continue
+            windows = np.lib.stride_tricks.sliding_window_view(data, n)
+            h = np.full(windows.shape[0], n, dtype=np.uint64)
+            with np.errstate(over="ignore"):  # wrap-around is the hash
+                for col in range(n):
+                    h = h * np.uint64(1099511628211) + windows[:, col]
+                h = h * _MIX
+                h ^= h >> np.uint64(29)
+            sign = np.where(h >> np.uint64(63), -1.0, 1.0)
+            v += np.bincount((h % np.uint64(self.dim)).astype(np.int64), weights=sign, minlength=self.dim)
+        v = v.astype(np.float32)
+        return v / (np.linalg.norm(v) + 1e-9)
+
+    def embed(self, texts: Sequence[str], progress: Optional[ProgressFn] = None) -> List[np.ndarray]:
+        t0 = time.perf_counter()
+        out = [self._vector(t) for t in texts]
+        if progress and out:
+            progress(len(out), len(out), time.perf_counter() - t0)
+        return out
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._vector(text)
+
+
+BACKENDS = ("ollama", "hashing")
+
+
+def get_embedder(backend: Optional[str] = None, **ollama_opts) -> Embedder:
+    """Backend from EMBED_BACKEND / EMBED_MODEL / EMBED_HASH_DIM unless given explicitly."""
+    backend = (backend or os.getenv("EMBED_BACKEND", "ollama")).strip().lower()
+    if backend == "hashing":
+        return HashingEmbedder(dim=int(os.getenv("EMBED_HASH_DIM", "512") or "512"))
+    if backend == "ollama":
+        return OllamaEmbedder(os.getenv("EMBED_MODEL", "nomic-embed-text"), **ollama_opts)
+    raise ValueError(f"Unknown EMBED_BACKEND {backend!r}; expected one of {BACKENDS}")
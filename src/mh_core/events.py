@@ -0,0 +1,156 @@
+# src/mh_core/events.py
+"""
+Non-blocking structured event log (crisis detections).
+
+    get_event_log().emit("crisis_detected", pattern="crisis.p4")
+
+emit() only appends a small dict to a bounded queue; a daemon thread drains
+it and writes JSON lines in batches, so a slow disk or pipe never holds up a
+request. When the queue is full the event is dropped and counted. Events carry
+pattern ids, never user text.
+
+Settings (env):
+- CRISIS_LOG        "stderr" (default), a file path (appended, JSON lines), or "off"
+- CRISIS_LOG_QUEUE  max buffered events (default 10000)
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Union
+
+_STOP = object()
+
+
+class EventLog:
+    def __init__(self, sink: Union[str, Path, TextIO], max_queue: int = 10000,
+                 batch_size: int = 256, flush_every: float = 0.5):
+        self._sink = sink
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_every = flush_every
+        self._emitted = 0
+        self._dropped = 0
+        self._written = 0
+        self._batches = 0
+        self._errors = 0
+        self._done = 0  # events written or lost to a write error
+        self._lock = threading.Lock()  # emit() runs on many request threads
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def emit(self, event: str, **fields) -> bool:
+        """Queue one event; False (and counted) if the buffer is full."""
+        record = {"ts": time.time(), "event": event, **fields}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._emitted += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued event has been written (tests, shutdown)."""
+        with self._lock:
+            target = self._emitted
+        deadline = time.monotonic() + timeout
+        while self._done < target:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "emitted": self._emitted,
+                "written": self._written,
+                "dropped": self._dropped,
+                "batches": self._batches,
+                "write_errors": self._errors,
+                "queued": self._queue.qsize(),
+            }
+
+    # ---------- writer thread
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_every)
+            except queue.Empty:
+                continue
+            batch: List[dict] = []
+            stop = first is _STOP
+            if not stop:
+                batch.append(first)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[dict]) -> None:
+        lines = []
+        for rec in batch:
+            rec["ts"] = datetime.fromtimestamp(rec["ts"], timezone.utc).isoformat(timespec="milliseconds")
+            lines.append(json.dumps(rec, separators=(",", ":")))
+        text = "\n".join(lines) + "\n"
+        try:
+            if isinstance(self._sink, (str, Path)):
+                with open(self._sink, "a", encoding="utf-8") as f:
+                    f.write(text)
+            else:
+                self._sink.write(text)
+                self._sink.flush()
+            ok = True
+        except Exception:
+            ok = False
+        with self._lock:
+            if ok:
+                self._written += len(batch)
+                self._batches += 1
+            else:
+                self._errors += 1
+            self._done += len(batch)
+
+
+_LOG: Optional[EventLog] = None
+_LOG_READY = False
+_LOG_LOCK = threading.Lock()
+
+
+def get_event_log() -> Optional[EventLog]:
+    """Process-wide crisis event log from env settings, or None when disabled."""
+    global _LOG, _LOG_READY
+    if not _LOG_READY:
+        with _LOG_LOCK:
+            if not _LOG_READY:
+                target = os.getenv("CRISIS_LOG", "stderr").strip()
+                if target.lower() not in ("off", "none", "false", "0", ""):
+                    sink: Union[Path, TextIO] = sys.stderr if target.lower() == "stderr" else Path(target)
+                    if isinstance(sink, Path):
+                        sink.parent.mkdir(parents=True, exist_ok=True)
+                    _LOG = EventLog(sink, max_queue=int(os.getenv("CRISIS_LOG_QUEUE", "10000") or "10000"))
+                _LOG_READY = True
+    return _LOG
@@ -1,9 +1,10 @@
 # src/mh_core/flow.py
 from .models import ChatState
-from .content_loader import STRINGS
+from .content_loader import strings
 
 def _next_prompt(step: str) -> str:
     """Return the correct prompt based on the current step."""
+    STRINGS = strings()
     return {
         "strengths": STRINGS.get("strengths_prompt", ""),
         "worries": STRINGS.get("worries_prompt", ""),
@@ -16,6 +17,7 @@ def _next_prompt(step: str) -> str:
 def advance_state(state: ChatState, user_text: str):
     """Advance the conversation state based on user input."""
     txt = (user_text or "").strip()
+    STRINGS = strings()
 
     # Allow user to ask for clarification (e.g. "what do you mean by strong?")
     if "what do you mean" in txt.lower() and "strong" in txt.lower():
@@ -0,0 +1,239 @@
+"""
+Shared keep-alive HTTP connection pool for the local Ollama server.
+
+Every Ollama call in mh_core (chat, embeddings, model tags) goes through
+``ollama_pool()`` so a TCP connection is reused across turns instead of
+being opened and torn down per request. The async request path uses
+``async_ollama_client()``, an httpx.AsyncClient with the same limits.
+
+Settings (env):
+- OLLAMA_POOL_SIZE  max idle connections kept per pool (default 8)
+- OLLAMA_POOL_IDLE  seconds an idle connection may be reused (default 30)
+"""
+from __future__ import annotations
+
+import http.client
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Connection errors that mean "the server closed our idle socket"; the request
+# is retried once on a fresh connection when one of these hits a reused socket.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive ``http.client.HTTPConnection`` objects."""
+
+    def __init__(self, host: str, port: int, maxsize: int = 8, idle_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.maxsize = max(1, int(maxsize))
+        self.idle_timeout = float(idle_timeout)
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "created": 0, "reused": 0, "retried": 0, "discarded": 0, "errors": 0}
+
+    # ---------- connection lifecycle
+    def _acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    self._stats["reused"] += 1
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                self._stats["discarded"] += 1
+                conn.close()
+            self._stats["created"] += 1
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout), False
+
+    def _release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable and conn.sock is not None:
+            with self._lock:
+                if len(self._idle) < self.maxsize:
+                    self._idle.append((conn, time.monotonic()))
+                    return
+                self._stats["discarded"] += 1
+        conn.close()
+
+    # ---------- public API
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60,
+    ) -> Tuple[int, bytes]:
+        """Send one request and return ``(status, body_bytes)``; the socket is kept for reuse."""
+        with self._lock:
+            self._stats["requests"] += 1
+        conn, reused = self._acquire(timeout)
+        try:
+            resp = self._send(conn, method, path, body, headers)
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused:
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            # The idle socket was closed by the server; retry once on a new one.
+            with self._lock:
+                self._stats["retried"] += 1
+                self._stats["created"] += 1
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+            try:
+                resp = self._send(conn, method, path, body, headers)
+            except Exception:
+                conn.close()
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+        except Exception:
+            conn.close()
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        try:
+            data = resp.read()
+        except Exception:
+            conn.close()
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        self._release(conn, not resp.will_close)
+        return resp.status, data
+
+    @contextmanager
+    def stream(
+        self,
+        method: str,
+        path: str,
+        body: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """
+        Yield the raw response for incremental reads (e.g. NDJSON streams).
+        The connection goes back to the pool only if the body was read to the end.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+        conn, reused = self._acquire(timeout)
+        try:
+            try:
+                resp = self._send(conn, method, path, body, headers)
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                with self._lock:
+                    self._stats["retried"] += 1
+                    self._stats["created"] += 1
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+                resp = self._send(conn, method, path, body, headers)
+        except Exception:
+            conn.close()
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        try:
+            yield resp
+        except BaseException:
+            conn.close()
+            raise
+        self._release(conn, resp.isclosed() and not resp.will_close)
+
+    @staticmethod
+    def _send(conn, method, path, body, headers) -> http.client.HTTPResponse:
+        conn.request(method, path, body=body, headers=headers or {})
+        return conn.getresponse()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus the current idle count and reuse rate (reused / requests)."""
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["idle"] = len(self._idle)
+        out["maxsize"] = self.maxsize
+        out["reuse_rate"] = round(out["reused"] / out["requests"], 4) if out["requests"] else 0.0
+        return out
+
+    def close(self) -> None:
+        """Close every idle connection (in-flight ones are closed on release)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+_POOLS: Dict[Tuple[str, int], ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(host: str, port: int) -> ConnectionPool:
+    """Return the process-wide pool for ``host:port``, creating it on first use."""
+    key = (host, int(port))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                host,
+                int(port),
+                maxsize=int(os.getenv("OLLAMA_POOL_SIZE", "8") or "8"),
+                idle_timeout=float(os.getenv("OLLAMA_POOL_IDLE", "30") or "30"),
+            )
+            _POOLS[key] = pool
+        return pool
+
+
+def ollama_pool() -> ConnectionPool:
+    """Pool for the configured Ollama server (OLLAMA_HOST / OLLAMA_PORT)."""
+    from .ai_gateway import OLLAMA_HOST, OLLAMA_PORT
+    return get_pool(OLLAMA_HOST, OLLAMA_PORT)
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    """Stats for every pool in this process, keyed by ``host:port``."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.items())
+    return {f"{h}:{p}": pool.stats() for (h, p), pool in pools}
+
+
+# ---------- async client (one per event loop; httpx pools are loop-bound)
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def async_ollama_client():
+    """Shared ``httpx.AsyncClient`` for Ollama on the running event loop."""
+    import asyncio
+    import httpx
+
+    from .ai_gateway import OLLAMA_HOST, OLLAMA_PORT
+
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        size = int(os.getenv("OLLAMA_POOL_SIZE", "8") or "8")
+        client = httpx.AsyncClient(
+            base_url=f"http://{OLLAMA_HOST}:{OLLAMA_PORT}",
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=size,
+                keepalive_expiry=float(os.getenv("OLLAMA_POOL_IDLE", "30") or "30"),
+            ),
+            timeout=60,
+        )
+        _ASYNC_CLIENTS[loop] = client
+    return client
@@ -0,0 +1,234 @@
+# src/mh_core/index_build.py
+"""
+Index building used by scripts/build_index.py.
+
+Each build writes its files into a fresh directory, content/index/<build id>/:
+- index_vectors.npy (+ index_vectors_scales.npy for int8)   see vector_index.py
+- index_meta.json       list of {id, text, topic}, one per vector row
+- index_manifest.json   model, dtype and {id, hash} per row, used to diff the next build
+- index_ivf.npz         optional IVF (approximate search) cells, see ann.py
+- index_lexical.npz     BM25 inverted index over the same rows, see lexical.py
+
+and only then publishes it by os.replace()ing content/index/CURRENT, a one-line
+file naming the build. A reader resolves CURRENT once (resolve_index) and takes
+every file from that directory, so it can never pair vectors from one build with
+meta or cells from another. Without CURRENT the flat content/index_*.* files of
+older checkouts are used. The previous build is kept for servers still reading
+it; older ones are removed.
+
+Incremental builds reuse the stored vector of every snippet whose id and
+content hash are unchanged, embed only new or edited snippets and drop
+deleted ones.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ann import IVFIndex, ivf_path
+from .lexical import LexicalIndex, lexical_path
+from .vector_index import VectorIndex
+
+MANIFEST_VERSION = 1
+
+# embed_texts(texts) -> one vector per text, in order
+EmbedFn = Callable[[Sequence[str]], List[np.ndarray]]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_snippets(know_path: Path) -> List[Dict[str, str]]:
+    items = []
+    for p in sorted(Path(know_path).glob("*.jsonl")):
+        for line in p.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            items.append({
+                "id": rec["id"],
+                "text": rec["text"],
+                "topic": rec.get("topic", ""),
+            })
+    return items
+
+
+def manifest_path(out_vecs: Path) -> Path:
+    return Path(out_vecs).with_name("index_manifest.json")
+
+
+def index_dir(out_vecs: Path) -> Path:
+    return Path(out_vecs).parent / "index"
+
+
+def current_build(out_vecs: Path) -> Optional[Path]:
+    """Directory of the published build, or None if there is none yet."""
+    root = index_dir(out_vecs)
+    try:
+        name = (root / "CURRENT").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    build = root / name
+    return build if name and os.sep not in name and build.is_dir() else None
+
+
+def resolve_index(out_vecs: Path, out_meta: Path) -> Tuple[Path, Path]:
+    """(vectors, meta) paths of the published build; the flat legacy paths if none."""
+    out_vecs, out_meta = Path(out_vecs), Path(out_meta)
+    build = current_build(out_vecs)
+    if build is None:
+        return out_vecs, out_meta
+    return build / out_vecs.name, build / out_meta.name
+
+
+def load_manifest(path: Path) -> Optional[dict]:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def plan_incremental(items: List[Dict[str, str]], manifest: Optional[dict], model: str,
+                     dtype: str = "float32") -> Tuple[Dict[int, int], List[int]]:
+    """
+    Diff current snippets against the previous manifest.
+    Returns (reuse, todo): reuse maps new row -> old row for unchanged snippets,
+    todo lists new rows that must be embedded. Deleted snippets appear in neither.
+    A different model or storage dtype reuses nothing (quantised rows are lossy).
+    """
+    old_rows: Dict[Tuple[str, str], int] = {}
+    if manifest and manifest.get("model") == model and manifest.get("dtype", "float32") == dtype:
+        for row, rec in enumerate(manifest.get("records", [])):
+            old_rows[(rec.get("id"), rec.get("hash"))] = row
+    reuse: Dict[int, int] = {}
+    todo: List[int] = []
+    for row, it in enumerate(items):
+        old = old_rows.get((it["id"], content_hash(it["text"])))
+        if old is None:
+            todo.append(row)
+        else:
+            reuse[row] = old
+    return reuse, todo
+
+
+# ---------- publishing
+def _atomic_write(path: Path, write: Callable[[str], None]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    _atomic_write(path, lambda tmp: Path(tmp).write_text(text, encoding="utf-8"))
+
+
+def _publish(out_vecs: Path, build: Path) -> None:
+    """Point CURRENT at `build`; keep the build it replaces and delete older ones."""
+    previous = current_build(out_vecs)
+    _atomic_write_text(index_dir(out_vecs) / "CURRENT", build.name + "\n")
+    keep = {build.name, previous.name if previous else None}
+    for old in index_dir(out_vecs).iterdir():
+        if old.is_dir() and old.name not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# ---------- build
+def build_index(
+    items: List[Dict[str, str]],
+    embed_texts: EmbedFn,
+    out_vecs: Path,
+    out_meta: Path,
+    model: str,
+    dtype: str = "float32",
+    incremental: bool = False,
+    ann_nlist: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Embed (or reuse) every snippet into a new build directory and publish it. Returns counts.
+    out_vecs/out_meta name the files; they live in content/index/<build id>/ next to
+    out_vecs (see resolve_index). ann_nlist builds an IVF index with that many cells
+    (0 = default for the size); None builds none.
+    """
+    out_vecs, out_meta = Path(out_vecs), Path(out_meta)
+    cur_vecs, _ = resolve_index(out_vecs, out_meta)
+    reuse: Dict[int, int] = {}
+    todo = list(range(len(items)))
+    old_index = None
+    old_ids: set = set()
+    if incremental and cur_vecs.exists():
+        manifest = load_manifest(manifest_path(cur_vecs))
+        if manifest is not None:
+            try:
+                # in memory: nothing keeps the old build mapped once this returns
+                old_index = VectorIndex.load(cur_vecs, mmap=False)
+            except (OSError, ValueError):
+                old_index = None
+            records = manifest.get("records", [])
+            if old_index is not None and len(old_index) == len(records):
+                reuse, todo = plan_incremental(items, manifest, model, dtype)
+                old_ids = {rec.get("id") for rec in records}
+            else:
+                old_index = None
+
+    fresh = embed_texts([items[i]["text"] for i in todo]) if todo else []
+    vecs: List[np.ndarray] = [None] * len(items)  # type: ignore[list-item]
+    for row, old in reuse.items():
+        vecs[row] = old_index.vector(old)
+    for row, v in zip(todo, fresh):
+        v = np.asarray(v, dtype=np.float32)
+        vecs[row] = v / (np.linalg.norm(v) + 1e-9)
+    matrix = np.stack(vecs).astype(np.float32) if vecs else np.zeros((0, 0), np.float32)
+
+    root = index_dir(out_vecs)
+    root.mkdir(parents=True, exist_ok=True)
+    build = Path(tempfile.mkdtemp(prefix=time.strftime("%Y%m%d-%H%M%S-"), dir=str(root)))
+    try:
+        vec_file = build / out_vecs.name
+        VectorIndex.from_vectors(matrix, dtype).save(vec_file)
+        (build / out_meta.name).write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
+        lexical = LexicalIndex.build([it["text"] for it in items])
+        lexical.save(lexical_path(vec_file))
+        if ann_nlist is not None and len(matrix):
+            IVFIndex.build(matrix, nlist=ann_nlist or None).save(ivf_path(vec_file))
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "model": model,
+            "dtype": dtype,
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 and len(matrix) else 0,
+            "records": [{"id": it["id"], "hash": content_hash(it["text"])} for it in items],
+        }
+        manifest_path(vec_file).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        _publish(out_vecs, build)
+    except BaseException:
+        if current_build(out_vecs) != build:
+            shutil.rmtree(build, ignore_errors=True)
+        raise
+
+    return {
+        "total": len(items),
+        "reused": len(reuse),
+        "embedded": len(todo),
+        "dropped": len(old_ids - {it["id"] for it in items}),
+    }
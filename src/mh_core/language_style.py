@@ -1,5 +1,7 @@
 ﻿from typing import Dict, Tuple
 
+from .phrases import PhraseMatcher
+
 LEGACY_TONE = {
     "greeting": "Hey, I'm here to listen. What's on your mind today?",
     "bridge_family": (
@@ -45,87 +47,122 @@ def _is_examples_question(text: str) -> bool:
     return t in {"what", "what?", "what do you mean", "not sure", "idk", "i dont know", "i don't know"}
 
 
+# ---------- keyword lists (matched with one automaton each, built at import)
+WORRY_WORDS = [
+    "stress",
+    "stressed",
+    "anxious",
+    "anxiety",
+    "panic",
+    "sad",
+    "depress",
+    "low",
+    "angry",
+    "anger",
+    "overwhelmed",
+    "worried",
+    "worry",
+    "scared",
+    "fear",
+    "tired",
+    "exhausted",
+    "burnt out",
+    "burned out",
+    "lonely",
+    "sleep",
+    "insomnia",
+    "problem",
+    "issue",
+    "help",
+    "support",
+    "advice",
+]
+
+PEOPLE_WORDS = [
+    "family",
+    "elder",
+    "elders",
+    "friend",
+    "friends",
+    "mate",
+    "mates",
+    "mum",
+    "mom",
+    "dad",
+    "mother",
+    "father",
+    "nan",
+    "pop",
+    "grandma",
+    "grandpa",
+    "aunty",
+    "uncle",
+    "cousin",
+    "cousins",
+    "brother",
+    "sister",
+    "siblings",
+    "partner",
+    "boyfriend",
+    "girlfriend",
+    "husband",
+    "wife",
+    "kids",
+    "children",
+    "child",
+    "son",
+    "daughter",
+    "mob",
+    "community",
+    "coach",
+    "teacher",
+    "counsellor",
+    "counselor",
+    "worker",
+]
+
+WORRY_KEYS = [
+    ("study", ["exam", "study", "assignment", "school", "uni", "college", "test"]),
+    ("work", ["work", "boss", "shift", "job"]),
+    ("money", ["money", "rent", "bills", "bill", "debt", "pay", "broke"]),
+    (
+        "relationships",
+        [
+            "relationship",
+            "partner",
+            "boyfriend",
+            "girlfriend",
+            "breakup",
+            "friend",
+            "argue",
+            "fight",
+        ],
+    ),
+    ("sorry_business", ["sorry business", "funeral", "grief", "loss"]),
+    ("health", ["health", "sick", "pain", "doctor", "gp"]),
+    ("smoking", ["smoke", "smoking", "cigarette", "ciggies"]),
+    ("alcohol", ["alcohol", "drink", "drinking", "grog"]),
+    ("sleep", ["sleep", "insomnia", "tired", "bedtime"]),
+    ("anxiety", ["anxiety", "panic", "worry", "worried", "nervous"]),
+    ("mood", ["depress", "sad", "low", "flat"]),
+    ("anger", ["anger", "angry", "mad"]),
+    ("substances", ["drugs", "ice", "weed", "cannabis", "marijuana"]),
+    ("racism", ["racism", "racist", "discrimination", "prejudice", "stereotype", "racial"]),
+    ("identity", ["identity", "culture", "language", "country", "mob"]),
+]
+
+_SIGNALS = PhraseMatcher({"worry": WORRY_WORDS, "people": PEOPLE_WORDS})
+_WORRY_CATEGORIES = PhraseMatcher(WORRY_KEYS)
+
+
 def _is_worry_signal(text: str) -> bool:
     """Rough signal that the user is sharing a worry/feeling rather than people/strengths."""
-    t = _norm(text)
-    WORRY_WORDS = [
-        "stress",
-        "stressed",
-        "anxious",
-        "anxiety",
-        "panic",
-        "sad",
-        "depress",
-        "low",
-        "angry",
-        "anger",
-        "overwhelmed",
-        "worried",
-        "worry",
-        "scared",
-        "fear",
-        "tired",
-        "exhausted",
-        "burnt out",
-        "burned out",
-        "lonely",
-        "sleep",
-        "insomnia",
-        "problem",
-        "issue",
-        "help",
-        "support",
-        "advice",
-    ]
-    return any(w in t for w in WORRY_WORDS)
+    return _SIGNALS.has(_norm(text), "worry")
 
 
 def _looks_like_people_list(text: str) -> bool:
     """Detects if the answer names support people (family/Elders/friends)."""
-    t = _norm(text)
-    PEOPLE_WORDS = [
-        "family",
-        "elder",
-        "elders",
-        "friend",
-        "friends",
-        "mate",
-        "mates",
-        "mum",
-        "mom",
-        "dad",
-        "mother",
-        "father",
-        "nan",
-        "pop",
-        "grandma",
-        "grandpa",
-        "aunty",
-        "uncle",
-        "cousin",
-        "cousins",
-        "brother",
-        "sister",
-        "siblings",
-        "partner",
-        "boyfriend",
-        "girlfriend",
-        "husband",
-        "wife",
-        "kids",
-        "children",
-        "child",
-        "son",
-        "daughter",
-        "mob",
-        "community",
-        "coach",
-        "teacher",
-        "counsellor",
-        "counselor",
-        "worker",
-    ]
-    return any(w in t for w in PEOPLE_WORDS)
+    return _SIGNALS.has(_norm(text), "people")
 
 
 def _classify_worry(text: str) -> Tuple[str, str]:
@@ -133,40 +170,11 @@ def _classify_worry(text: str) -> Tuple[str, str]:
     t = _norm(text)
     if not t:
         return "", ""
-    KEYS = [
-        ("study", ["exam", "study", "assignment", "school", "uni", "college", "test"]),
-        ("work", ["work", "boss", "shift", "job"]),
-        ("money", ["money", "rent", "bills", "bill", "debt", "pay", "broke"]),
-        (
-            "relationships",
-            [
-                "relationship",
-                "partner",
-                "boyfriend",
-                "girlfriend",
-                "breakup",
-                "friend",
-                "argue",
-                "fight",
-            ],
-        ),
-        ("sorry_business", ["sorry business", "funeral", "grief", "loss"]),
-        ("health", ["health", "sick", "pain", "doctor", "gp"]),
-        ("smoking", ["smoke", "smoking", "cigarette", "ciggies"]),
-        ("alcohol", ["alcohol", "drink", "drinking", "grog"]),
-        ("sleep", ["sleep", "insomnia", "tired", "bedtime"]),
-        ("anxiety", ["anxiety", "panic", "worry", "worried", "nervous"]),
-        ("mood", ["depress", "sad", "low", "flat"]),
-        ("anger", ["anger", "angry", "mad"]),
-        ("substances", ["drugs", "ice", "weed", "cannabis", "marijuana"]),
-        ("racism", ["racism", "racist", "discrimination", "prejudice", "stereotype", "racial"]),
-        ("identity", ["identity", "culture", "language", "country", "mob"]),
-    ]
-    for cat, kws in KEYS:
-        for k in kws:
-            if k in t:
-                return cat, k
-    return "", ""
+    # earliest-listed keyword wins, same as scanning WORRY_KEYS in order
+    hit = _WORRY_CATEGORIES.first(t)
+    if hit is None:
+        return "", ""
+    return hit.category, hit.phrase
 
 
 def _goal_suggestions(cat: str) -> str:
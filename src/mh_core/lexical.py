@@ -0,0 +1,108 @@
+# src/mh_core/lexical.py
+"""
+BM25 lexical retrieval over the index_meta.json snippets (no model call).
+
+The index is an inverted file in CSR form: for term t, postings
+indptr[t]:indptr[t+1] hold the snippet rows containing t and the precomputed
+BM25 weight of t in each row. A query is then a handful of vectorised
+scatter-adds, i.e. microseconds for a knowledge base of thousands of snippets.
+
+build_index.py writes it as index_lexical.npz next to the vectors; rag.py
+builds it from index_meta.json on the fly when the file is missing.
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have i if in into is it its "
+    "me my of on or so than that the their them then there these they this to "
+    "was we were what when which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords; "friend's" -> "friend"."""
+    out = []
+    for tok in _TOKEN_RE.findall((text or "").lower().replace("’", "'")):
+        if tok.endswith("'s"):
+            tok = tok[:-2]
+        if tok and tok not in STOPWORDS:
+            out.append(tok)
+    return out
+
+
+class LexicalIndex:
+    def __init__(self, terms: Sequence[str], indptr: np.ndarray, rows: np.ndarray, weights: np.ndarray, n_docs: int):
+        self.terms = list(terms)
+        self.vocab: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self.indptr = indptr.astype(np.int64)
+        self.rows = rows.astype(np.int32)
+        self.weights = weights.astype(np.float32)
+        self.n_docs = int(n_docs)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @classmethod
+    def build(cls, texts: Sequence[str], k1: float = 1.5, b: float = 0.75) -> "LexicalIndex":
+        docs = [Counter(tokenize(t)) for t in texts]
+        lengths = np.array([sum(d.values()) for d in docs], dtype=np.float32)
+        avgdl = float(lengths.mean()) if len(docs) and lengths.mean() > 0 else 1.0
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for row, counts in enumerate(docs):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        rows: List[int] = []
+        weights: List[float] = []
+        n = len(docs)
+        for i, term in enumerate(terms):
+            plist = postings[term]
+            idf = np.log(1.0 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for row, tf in plist:
+                norm = k1 * (1.0 - b + b * lengths[row] / avgdl)
+                rows.append(row)
+                weights.append(idf * tf * (k1 + 1.0) / (tf + norm))
+            indptr[i + 1] = len(rows)
+        return cls(terms, indptr, np.array(rows, dtype=np.int32), np.array(weights, dtype=np.float32), n)
+
+    def scores(self, text: str) -> np.ndarray:
+        """BM25 score of every snippet for the query text (0 where no term matches)."""
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        for term, qtf in Counter(tokenize(text)).items():
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.indptr[t], self.indptr[t + 1]
+            out[self.rows[lo:hi]] += qtf * self.weights[lo:hi]  # rows are unique within a posting list
+        return out
+
+    def search(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """Top-k (row, score) pairs with a positive score, best first."""
+        scores = self.scores(text)
+        hit = np.flatnonzero(scores > 0)
+        top = hit[np.argsort(-scores[hit], kind="stable")[:k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, terms=np.array(self.terms, dtype=str), indptr=self.indptr,
+                     rows=self.rows, weights=self.weights, n_docs=np.array(self.n_docs))
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        with np.load(path) as z:
+            return cls(z["terms"].tolist(), z["indptr"], z["rows"], z["weights"], int(z["n_docs"]))
+
+
+def lexical_path(vectors_path: Path) -> Path:
+    return Path(vectors_path).with_name("index_lexical.npz")
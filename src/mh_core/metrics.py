@@ -0,0 +1,136 @@
+# src/mh_core/metrics.py
+"""
+Lightweight latency instrumentation for the chat path.
+
+    with stage("retrieval"):
+        ...
+
+records the elapsed time into a histogram (mh_stage_seconds{stage="retrieval"})
+and, while a request is being traced (see api.py's middleware), into that
+request's per-stage breakdown used for the optional Server-Timing header.
+A timer costs a couple of microseconds: perf_counter, one bisect and a lock.
+
+render() produces the Prometheus text exposition format served at /metrics.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# seconds; spans regex checks (tens of µs) to slow CPU generations (tens of s)
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Registry:
+    def __init__(self):
+        self._hists: Dict[Tuple[str, str, str], Histogram] = {}  # (metric, label, value)
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, metric: str, label: str, value: str, help: str = "") -> Histogram:
+        key = (metric, label, value)
+        h = self._hists.get(key)
+        if h is None:
+            with self._lock:
+                h = self._hists.setdefault(key, Histogram())
+                if help:
+                    self._help.setdefault(metric, help)
+        return h
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            items = sorted(self._hists.items())
+        seen = set()
+        for (metric, label, value), h in items:
+            if metric not in seen:
+                seen.add(metric)
+                if metric in self._help:
+                    lines.append(f"# HELP {metric} {self._help[metric]}")
+                lines.append(f"# TYPE {metric} histogram")
+            counts, total, count = h.snapshot()
+            running = 0
+            for bound, c in zip(h.buckets, counts):
+                running += c
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound:g}"}} {running}')
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{{label}="{value}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{{label}="{value}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# per-request stage breakdown: list of (stage, seconds), set by the API middleware
+_current: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "mh_stage_timings", default=None
+)
+
+
+def observe(name: str, seconds: float) -> None:
+    REGISTRY.histogram("mh_stage_seconds", "stage", name, "Time spent per chat pipeline stage").observe(seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+
+def observe_request(path: str, seconds: float) -> None:
+    REGISTRY.histogram("mh_request_seconds", "path", path, "End-to-end request latency").observe(seconds)
+
+
+def start_trace() -> Tuple[List[Tuple[str, float]], contextvars.Token]:
+    trace: List[Tuple[str, float]] = []
+    return trace, _current.set(trace)
+
+
+def end_trace(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def server_timing(trace: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Server-Timing header value; repeated stages are summed."""
+    merged: Dict[str, float] = {}
+    for name, secs in trace:
+        merged[name] = merged.get(name, 0.0) + secs
+    parts = [f"{name};dur={secs * 1000:.2f}" for name, secs in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,263 @@
+# src/mh_core/mock_ollama.py
+"""
+Stand-in for a local Ollama server, for tests, load tests and benchmarks.
+
+Endpoints:
+- POST /api/chat        non-streaming JSON, or NDJSON chunks when "stream" is
+                        true (Ollama's default); the final object carries
+                        prompt_eval/eval counts and durations like the real one
+- POST /api/embed       {"input": [...]} -> {"embeddings": [...]}
+- POST /api/embeddings  {"prompt" | "input": text} -> {"embedding": [...]}
+- GET  /api/tags        the configured model
+
+Replies and vectors (HashingEmbedder) are deterministic. Knobs, all
+changeable on a running server through MockOllama.config:
+- latency     seconds before the first byte of every POST
+- token_rate  generated tokens per second (0 = instant)
+- fail_rate   share of POSTs that fail, chosen by a seeded RNG
+- fail_mode   "http500" (error JSON) or "disconnect" (close without a response)
+
+Standard library only (ThreadingHTTPServer, HTTP/1.1 keep-alive, chunked streams).
+
+    python -m src.mh_core.mock_ollama --port 11434 --latency 0.2 --token-rate 30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from .embeddings import HashingEmbedder
+
+DEFAULT_MODEL = "llama3.2:3b-instruct-q4_K_M"
+FAIL_MODES = ("http500", "disconnect")
+
+_REPLIES = (
+    "That sounds like a lot to carry. What is one small thing that has helped before?",
+    "Thanks for sharing that. Who is someone you trust that you could talk to?",
+    "It makes sense to feel that way. What would a good next step look like for you?",
+)
+
+
+@dataclass
+class MockConfig:
+    model: str = DEFAULT_MODEL
+    latency: float = 0.0
+    token_rate: float = 0.0
+    fail_rate: float = 0.0
+    fail_mode: str = "http500"
+    embed_dim: int = 512
+    seed: int = 0
+
+
+def _tokens(text: str) -> List[str]:
+    """Split a reply into word-sized chunks that join back to the original text."""
+    words = text.split(" ")
+    return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+
+def _last_user(payload: dict) -> str:
+    for m in reversed(payload.get("messages") or []):
+        if m.get("role") == "user":
+            return m.get("content", "")
+    return ""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, *args):  # keep test and load-test output clean
+        pass
+
+    # ---------- responses
+    def _json(self, status: int, obj: dict) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, obj: dict) -> None:
+        line = json.dumps(obj).encode("utf-8") + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def _payload(self) -> dict:
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    # ---------- routes
+    def do_GET(self):
+        self.server.count(self.path)
+        if self.path == "/api/tags":
+            model = self.server.config.model
+            self._json(200, {"models": [{"name": model, "model": model}]})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        payload = self._payload()
+        self.server.count(self.path)
+        cfg = self.server.config
+        if cfg.latency:
+            time.sleep(cfg.latency)
+        if self.server.should_fail():
+            self.server.count("failures")
+            if cfg.fail_mode == "disconnect":
+                self.close_connection = True
+                return
+            self._json(500, {"error": "injected failure"})
+            return
+        if self.path == "/api/chat":
+            self._chat(payload)
+        elif self.path == "/api/embed":
+            texts = payload.get("input")
+            texts = [texts] if isinstance(texts, str) else list(texts or [])
+            vecs = self.server.embedder.embed(texts)
+            self._json(200, {"model": payload.get("model"), "embeddings": [v.tolist() for v in vecs]})
+        elif self.path == "/api/embeddings":
+            text = payload.get("prompt") or payload.get("input") or ""
+            self._json(200, {"embedding": self.server.embedder.embed_query(text).tolist()})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def _chat(self, payload: dict) -> None:
+        cfg = self.server.config
+        t0 = time.perf_counter_ns()
+        reply = _REPLIES[len(_last_user(payload)) % len(_REPLIES)]
+        limit = (payload.get("options") or {}).get("num_predict")
+        pieces = _tokens(reply)
+        if isinstance(limit, int) and limit > 0:
+            pieces = pieces[:limit]
+        prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages") or [])
+        delay = 1.0 / cfg.token_rate if cfg.token_rate > 0 else 0.0
+
+        def final(content: str) -> dict:
+            total = time.perf_counter_ns() - t0
+            return {
+                "model": cfg.model, "message": {"role": "assistant", "content": content}, "done": True,
+                "total_duration": total, "load_duration": 0,
+                "prompt_eval_count": max(1, prompt_chars // 4), "prompt_eval_duration": int(cfg.latency * 1e9),
+                "eval_count": len(pieces), "eval_duration": total,
+            }
+
+        if payload.get("stream", True) is False:
+            if delay:
+                time.sleep(delay * len(pieces))
+            self._json(200, final("".join(pieces)))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for piece in pieces:
+                if delay:
+                    time.sleep(delay)
+                self._chunk({"model": cfg.model, "message": {"role": "assistant", "content": piece}, "done": False})
+            self._chunk(final(""))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client stopped reading (e.g. output filter tripped)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, config: MockConfig):
+        super().__init__(addr, _Handler)
+        self.config = config
+        self.embedder = HashingEmbedder(dim=config.embed_dim)
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.counts: Counter = Counter()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def should_fail(self) -> bool:
+        if self.config.fail_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.config.fail_rate
+
+
+class MockOllama:
+    """Run the mock in a background thread: `with MockOllama(latency=0.1) as m: ... m.port`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **config):
+        self.config = MockConfig(**config)
+        if self.config.fail_mode not in FAIL_MODES:
+            raise ValueError(f"fail_mode must be one of {FAIL_MODES}")
+        self._server = _Server((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def stats(self) -> Dict[str, int]:
+        """Requests seen per path, plus "failures" injected."""
+        with self._server._lock:
+            return dict(self._server.counts)
+
+    def start(self) -> "MockOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Mock Ollama server for offline testing and benchmarks")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11434)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte of every POST")
+    ap.add_argument("--token-rate", type=float, default=0.0, help="generated tokens per second (0 = instant)")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of POSTs that fail (0..1)")
+    ap.add_argument("--fail-mode", choices=FAIL_MODES, default="http500")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    mock = MockOllama(args.host, args.port, model=args.model, latency=args.latency, token_rate=args.token_rate,
+                      fail_rate=args.fail_rate, fail_mode=args.fail_mode, seed=args.seed)
+    print(f"Mock Ollama on {mock.url} (model {args.model})")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
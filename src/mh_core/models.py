@@ -20,16 +20,19 @@ class ChatIn(BaseModel):
     Incoming payload from the app.
     - message: the latest user text
     - state: (optional) previous conversation state
+    - session_id: (optional) server-side session instead of `state` (SESSION_STORE enabled)
     """
     message: str
     state: Optional[ChatState] = None
+    session_id: Optional[str] = None
     fast: Optional[bool] = None  # optional client hint to enable fast mode per-request
+    no_cache: Optional[bool] = None  # skip the response cache for this turn
 
 class ChatOut(BaseModel):
     """
     Server response:
     - reply: text for the chatbot to show
-    - state: updated conversation state
+    - state: updated conversation state (omitted when the server keeps it under session_id)
     - tool: optional routing signal (e.g., 'route_to_support' for crisis)
     """
     reply: Optional[str] = None
@@ -38,3 +41,11 @@ class ChatOut(BaseModel):
     # Optional richer payloads (used by chat.html for crisis flow)
     mode: Optional[str] = None
     messages: Optional[List[str]] = None
+    session_id: Optional[str] = None
+
+class ScreenBatchIn(BaseModel):
+    """
+    Messages to screen in one call (e.g. a stored transcript after the patterns change).
+    Parallelism is a server setting (SCREEN_WORKERS), not part of the request.
+    """
+    messages: List[str]
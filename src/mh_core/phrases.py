@@ -0,0 +1,142 @@
+# src/mh_core/phrases.py
+"""
+Multi-phrase matcher (Aho-Corasick automaton).
+
+Built once from categorised phrase lists, then finds every occurrence of
+every phrase in a single pass over the text, however many phrases there are.
+Matching is plain substring matching on lower-cased text, i.e. the same
+semantics as `phrase in text.lower()`, but with spans and categories.
+
+    m = PhraseMatcher({"people": ["mum", "dad"], "worry": ["exam"]})
+    m.find_all("mum says exam")   # [PhraseMatch(0, 3, 'mum', 'people', 0), ...]
+
+find_longest() adds the selection a replacer needs: whole words only,
+leftmost-longest, non-overlapping.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+
+@dataclass(frozen=True)
+class PhraseMatch:
+    start: int
+    end: int
+    phrase: str
+    category: str
+    rank: int  # insertion order across all categories (lower = listed earlier)
+
+
+PhraseGroups = Union[Mapping[str, Iterable[str]], Iterable[Tuple[str, Iterable[str]]]]
+
+
+class PhraseMatcher:
+    def __init__(self, groups: PhraseGroups):
+        items = groups.items() if isinstance(groups, Mapping) else groups
+        # entries[i] = (phrase, category, rank)
+        self._entries: List[Tuple[str, str, int]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for category, phrases in items:
+            for phrase in phrases:
+                key = (phrase or "").lower()
+                if not key:
+                    continue
+                self._add(key, len(self._entries))
+                self._entries.append((key, category, len(self._entries)))
+        self._build_links()
+
+    # ---------- construction
+    def _add(self, key: str, entry_id: int) -> None:
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(entry_id)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # inherit outputs of the suffix state so each position reports every phrase ending there
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    # ---------- matching
+    @staticmethod
+    def _fold(text: str) -> str:
+        """Lower-case without changing length, so spans index the original text."""
+        low = text.lower()
+        if len(low) == len(text):
+            return low
+        return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+    def find_all(self, text: str) -> List[PhraseMatch]:
+        """Every (possibly overlapping) phrase occurrence, ordered by end position."""
+        if not text or not self._entries:
+            return []
+        goto, fail, out, entries = self._goto, self._fail, self._out, self._entries
+        matches: List[PhraseMatch] = []
+        node = 0
+        for i, ch in enumerate(self._fold(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for eid in out[node]:
+                phrase, category, rank = entries[eid]
+                matches.append(PhraseMatch(i + 1 - len(phrase), i + 1, phrase, category, rank))
+        return matches
+
+    def find_longest(self, text: str, whole_words: bool = True) -> List[PhraseMatch]:
+        """
+        Non-overlapping matches, leftmost first and longest at each position
+        (ties go to the phrase listed earliest). With whole_words, a match must
+        not start or end inside a word ("mob" does not match in "mobile").
+        """
+        matches = self.find_all(text)
+        if whole_words:
+            n = len(text)
+            matches = [
+                m for m in matches
+                if (m.start == 0 or not text[m.start - 1].isalnum()) and (m.end == n or not text[m.end].isalnum())
+            ]
+        matches.sort(key=lambda m: (m.start, m.start - m.end, m.rank))
+        chosen: List[PhraseMatch] = []
+        pos = 0
+        for m in matches:
+            if m.start >= pos:
+                chosen.append(m)
+                pos = m.end
+        return chosen
+
+    def categories(self, text: str) -> Set[str]:
+        """Set of categories with at least one phrase in `text`."""
+        return {m.category for m in self.find_all(text)}
+
+    def has(self, text: str, category: Optional[str] = None) -> bool:
+        if category is None:
+            return bool(self.find_all(text))
+        return category in self.categories(text)
+
+    def first(self, text: str) -> Optional[PhraseMatch]:
+        """The matching phrase listed earliest (lowest rank), mirroring a loop over the lists."""
+        matches = self.find_all(text)
+        return min(matches, key=lambda m: m.rank) if matches else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,111 @@
+# src/mh_core/prompting.py
+"""
+Settings and system-prompt assembly for /chat.
+
+- Env toggles (PLAIN_ENGLISH_MODE, FAST_MODE) are read once at import;
+  call reload_settings() after changing them at runtime.
+- content/style_guide_local.json comes from the content registry
+  (content_loader.CONTENT): parsed once, swapped in when the file changes,
+  no disk I/O on the turn path.
+- The static part of the prompt (SYSTEM_PROMPT + style guide) is memoised
+  per (plain_mode, style) variant.
+- build_messages() sends that static prompt as the first message, byte-identical
+  every turn, and puts per-turn lexicon notes and context in a second system
+  message. Ollama (llama.cpp) then reuses the KV cache for the shared prefix
+  instead of re-evaluating several hundred system tokens per turn.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List
+
+from .ai_gateway import SYSTEM_PROMPT
+from .content_loader import CONTENT
+
+STYLE_GUIDE_PATH = Path(__file__).resolve().parents[2] / "content" / "style_guide_local.json"
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    plain_english: bool
+    fast_mode: bool
+
+
+def _read_settings() -> Settings:
+    return Settings(
+        plain_english=_env_flag("PLAIN_ENGLISH_MODE", "true"),
+        fast_mode=_env_flag("FAST_MODE", "true"),
+    )
+
+
+SETTINGS = _read_settings()
+
+
+def reload_settings() -> Settings:
+    """Re-read the env toggles (e.g. from tests or an admin hook)."""
+    global SETTINGS
+    SETTINGS = _read_settings()
+    return SETTINGS
+
+
+def _parse_style_guide(text: str) -> str:
+    return (json.loads(text).get("append") or "").strip()
+
+
+_STYLE_GUIDE = CONTENT.watch(STYLE_GUIDE_PATH.name, parse=_parse_style_guide, default="")
+
+
+def style_guide_append() -> str:
+    """Current local style guide text ("" if the file is missing or invalid)."""
+    return _STYLE_GUIDE.get()
+
+
+@lru_cache(maxsize=8)
+def _static_prompt(plain_mode: bool, style_append: str) -> str:
+    system = SYSTEM_PROMPT
+    if style_append and plain_mode:
+        system += "\n\nLOCAL STYLE GUIDE:\n" + style_append
+    return system
+
+
+def base_system_prompt(plain_mode: bool) -> str:
+    """SYSTEM_PROMPT plus the style guide (when plain mode is on), memoised per variant."""
+    return _static_prompt(plain_mode, style_guide_append())
+
+
+def build_system_prompt(plain_mode: bool, lex_notes: List[str], context: str) -> str:
+    """Single system message (static prompt + turn notes); build_messages() is what /chat uses."""
+    system = base_system_prompt(plain_mode)
+    notes = turn_notes(lex_notes, context)
+    return system + "\n\n" + notes if notes else system
+
+
+def turn_notes(lex_notes: List[str], context: str) -> str:
+    """Per-turn system text (lexicon notes + approved context), "" when there is none."""
+    parts = []
+    if lex_notes:
+        parts.append("LEXICON NOTES (user terms):\n- " + "\n- ".join(lex_notes))
+    if context:
+        parts.append("APPROVED CONTEXT:\n" + context)
+    return "\n\n".join(parts)
+
+
+def build_messages(plain_mode: bool, lex_notes: List[str], context: str, user: str) -> List[Dict[str, str]]:
+    """
+    Chat messages for one turn, ordered for prefix caching: the static system prompt
+    first (identical across turns), then the turn notes, then the user message.
+    """
+    messages = [{"role": "system", "content": base_system_prompt(plain_mode)}]
+    notes = turn_notes(lex_notes, context)
+    if notes:
+        messages.append({"role": "system", "content": notes})
+    messages.append({"role": "user", "content": user})
+    return messages
@@ -1,50 +1,269 @@
-import json, http.client, os
-from functools import lru_cache
+import asyncio, json, os, sys, threading
+from collections import OrderedDict
 import numpy as np
 from pathlib import Path
 
-EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+from .embeddings import get_embedder
+from .vector_index import VectorIndex
+from .ann import IVFIndex, ivf_path
+from .lexical import LexicalIndex, lexical_path
+from .embed_cache import get_cache
+from .metrics import stage
+from .index_build import load_manifest, manifest_path, resolve_index
+
+# names of the index files; the published build under content/index/ is used (see index_build)
 VECS = Path("content/index_vectors.npy")
 META = Path("content/index_meta.json")
+# "vector" (embeddings), "lexical" (BM25 only, no embedding call) or "hybrid" (both, fused)
+RAG_MODE = os.getenv("RAG_MODE", "vector").strip().lower()
+# weight of the vector score in hybrid mode; BM25 (scaled to 0..1) gets the rest
+RAG_HYBRID_ALPHA = float(os.getenv("RAG_HYBRID_ALPHA", "0.5") or "0.5")
+RAG_EMBED_TIMEOUT = float(os.getenv("RAG_EMBED_TIMEOUT", "15") or "15")
+# IVF cells scanned per query (recall/latency knob); "off" forces brute force
+RAG_NPROBE = os.getenv("RAG_NPROBE", "8")
 
-_vectors = None
+_index = None  # VectorIndex, memory-mapped read-only
+_ivf = None    # IVFIndex when build_index.py --ann wrote one
+_lexical = None  # LexicalIndex over the same rows as _meta
 _meta = None
+_files = None  # (vectors, meta) of the build this process serves, resolved once
+_backend = None  # Embedder from EMBED_BACKEND, created on first use
+_vectors_ok = True  # False when the index was built with a different embedder
+
+# Small in-process LRU shared by the sync and async embedding paths
+_EMBED_CACHE_MAX = 256
+_embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_embed_lock = threading.Lock()
+
+def _cache_get(text: str):
+    with _embed_lock:
+        v = _embed_cache.get(text)
+        if v is not None:
+            _embed_cache.move_to_end(text)
+        return v
+
+def _cache_put(text: str, v) -> None:
+    with _embed_lock:
+        _embed_cache[text] = v
+        _embed_cache.move_to_end(text)
+        while len(_embed_cache) > _EMBED_CACHE_MAX:
+            _embed_cache.popitem(last=False)
+
+def _embedder():
+    global _backend
+    if _backend is None:
+        _backend = get_embedder(timeout=RAG_EMBED_TIMEOUT)
+    return _backend
+
+def _disk():
+    return get_cache() if _embedder().cacheable else None
+
+def _disk_get(text: str):
+    disk = _disk()
+    if disk is None:
+        return None
+    # once the index is loaded, only vectors of its width are usable
+    dim = int(_index.data.shape[1]) if _index is not None and len(_index) else None
+    v = disk.get(_embedder().name, text, dim)
+    if v is not None:
+        _cache_put(text, v)
+    return v
+
+def _disk_put(text: str, v) -> None:
+    disk = _disk()
+    if disk is not None:
+        disk.put(_embedder().name, text, v)
+
+def _lookup(text: str):
+    """In-process LRU first, then the shared on-disk cache."""
+    v = _cache_get(text)
+    return v if v is not None else _disk_get(text)
+
+def _store(text: str, v) -> None:
+    _cache_put(text, v)
+    _disk_put(text, v)
+
+def _unit(v):
+    v = np.asarray(v, dtype="float32")
+    return v / (np.linalg.norm(v) + 1e-9)
 
-@lru_cache(maxsize=256)
 def _embed_one(text: str):
-    """Embed a single text with Ollama. Handles 'embedding' and 'embeddings' keys."""
-    conn = http.client.HTTPConnection("127.0.0.1", 11434, timeout=15)
-    payload = {"model": EMBED_MODEL, "input": text}
-    conn.request("POST", "/api/embeddings", body=json.dumps(payload), headers={"Content-Type":"application/json"})
-    resp = conn.getresponse()
-    raw = resp.read().decode("utf-8", errors="ignore")
-    conn.close()
-
-    obj = json.loads(raw)
-    if "embedding" in obj and isinstance(obj["embedding"], list):
-        v = np.array(obj["embedding"], dtype="float32")
-    elif "embeddings" in obj and isinstance(obj["embeddings"], list) and obj["embeddings"]:
-        v = np.array(obj["embeddings"][0], dtype="float32")
-    else:
-        v = np.random.normal(size=(384,)).astype("float32")
-    v = v / (np.linalg.norm(v) + 1e-9)
+    """Embed a single text with the configured backend (cached in memory and on disk)."""
+    v = _lookup(text)
+    if v is not None:
+        return v
+    v = _unit(_embedder().embed_query(text))
+    _store(text, v)
+    return v
+
+async def _embed_one_async(text: str):
+    """Non-blocking _embed_one for the async request path (same caches; SQLite runs in a thread)."""
+    v = _cache_get(text)
+    if v is None:
+        v = await asyncio.to_thread(_disk_get, text)
+    if v is not None:
+        return v
+    v = _unit(await _embedder().embed_query_async(text))
+    _cache_put(text, v)
+    await asyncio.to_thread(_disk_put, text, v)
     return v
 
+def _index_files():
+    """Pin one build: every index file this process loads comes from the same directory."""
+    global _files
+    if _files is None:
+        _files = resolve_index(VECS, META)
+    return _files
+
+def _load_meta():
+    global _meta
+    if _meta is None:
+        meta = _index_files()[1]
+        if not meta.exists():
+            raise FileNotFoundError("Missing index files. Run:  python scripts\\build_index.py")
+        _meta = json.loads(meta.read_text(encoding="utf-8"))
+
 def _load_index():
-    global _vectors, _meta
-    if _vectors is None:
-        if not VECS.exists() or not META.exists():
+    global _index, _ivf, _vectors_ok
+    if _index is None:
+        vecs = _index_files()[0]
+        if not vecs.exists():
             raise FileNotFoundError("Missing index files. Run:  python scripts\\build_index.py")
-        _vectors = np.load(VECS)
-        _meta = json.loads(META.read_text(encoding="utf-8"))
+        _load_meta()
+        _index = VectorIndex.load(vecs, mmap=True)
+        manifest = load_manifest(manifest_path(vecs))
+        _vectors_ok = manifest is None or manifest.get("model") == _embedder().name
+        if not _vectors_ok:
+            print(f"[rag] index built with {manifest.get('model')!r}, EMBED_BACKEND gives "
+                  f"{_embedder().name!r}; using lexical retrieval", file=sys.stderr)
+        _ivf = None
+        ivf_file = ivf_path(vecs)
+        if ivf_file.exists() and RAG_NPROBE.lower() != "off":
+            ivf = IVFIndex.load(ivf_file)
+            if ivf.order.size == len(_index):  # ignore cells left over from another build
+                _ivf = ivf
 
-def retrieve_context(user_text: str, k: int = 1) -> str:
+def _load_lexical():
+    """BM25 index from build_index.py, or built from index_meta.json if missing/stale."""
+    global _lexical
+    if _lexical is None:
+        _load_meta()
+        lex_file = lexical_path(_index_files()[0])
+        lex = LexicalIndex.load(lex_file) if lex_file.exists() else None
+        if lex is None or len(lex) != len(_meta):
+            lex = LexicalIndex.build([m["text"] for m in _meta])
+        _lexical = lex
+
+def _nprobe() -> int:
+    try:
+        return max(1, int(RAG_NPROBE))
+    except ValueError:
+        return 8
+
+def _top_k(sims, k: int):
+    """Indices of the k highest scores, best first (argpartition + sort of k items only)."""
+    n = sims.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-sims, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-sims[idx], kind="stable")]
+
+def search(q, k: int = 1, nprobe=None):
+    """
+    Top-k (index, score) pairs for a normalised query vector against the loaded index.
+    Uses the IVF index when one was built (nprobe cells, default RAG_NPROBE), else brute force.
+    """
+    _load_index()
+    if _ivf is not None:
+        rows, scores = _ivf.search(_index, q, k, nprobe or _nprobe())
+        return [(int(i), float(s)) for i, s in zip(rows, scores)]
+    sims = _index.scores(q)
+    top = _top_k(sims, k)
+    return [(int(i), float(sims[i])) for i in top]
+
+def lexical_search(text: str, k: int = 1):
+    """Top-k (index, BM25 score) pairs; no embedding call."""
+    _load_lexical()
+    return _lexical.search(text, k)
+
+def hybrid_search(q, text: str, k: int = 1, alpha=None):
+    """
+    Top-k (index, fused score): alpha * cosine + (1 - alpha) * BM25 / best BM25.
+    Candidates are the top few of each retriever, so IVF search still applies.
+    """
+    _load_index()
+    _load_lexical()
+    alpha = RAG_HYBRID_ALPHA if alpha is None else alpha
+    pool = max(4 * k, 20)
+    lex = _lexical.scores(text)
+    cand = {i for i, _ in search(q, pool)}
+    cand.update(int(i) for i in _top_k(lex, pool) if lex[i] > 0)
+    rows = np.fromiter(sorted(cand), dtype=np.int64, count=len(cand))
+    best = float(lex.max()) if lex.size else 0.0
+    lex_part = lex[rows] / best if best > 0 else np.zeros(len(rows), dtype=np.float32)
+    fused = alpha * _index.scores_for(q, rows) + (1.0 - alpha) * lex_part
+    return [(int(rows[i]), float(fused[i])) for i in _top_k(fused, k)]
+
+def _records(pairs):
+    return [dict(_meta[i], score=score) for i, score in pairs]
+
+def _hits(q, k: int):
+    return _records(search(q, k))
+
+def _rank(q, user_text: str, k: int):
+    if q.shape[0] != _index.data.shape[1]:  # query and index come from different embedders
+        return _records(lexical_search(user_text, k))
+    if RAG_MODE == "hybrid":
+        return _records(hybrid_search(q, user_text, k))
+    return _hits(q, k)
+
+def _format_context(hits) -> str:
+    return "\n".join(f"- {h['text']}" for h in hits)
+
+def retrieve_snippets(user_text: str, k: int = 1):
+    """Top-k snippet records (id/text/topic as in index_meta.json) each with a `score`."""
     # For very short inputs, skip retrieval to reduce latency
     if not user_text or len(user_text.strip()) < 12:
-        return ""
+        return []
+    if RAG_MODE == "lexical":
+        with stage("search"):
+            return _records(lexical_search(user_text, k))
     _load_index()
-    q = _embed_one(user_text)
-    sims = (_vectors @ q).tolist()
-    top = sorted(range(len(sims)), key=lambda i: sims[i], reverse=True)[:k]
-    snippets = [_meta[i]["text"] for i in top]
-    return "\n".join(f"- {s}" for s in snippets)
+    if not _vectors_ok:
+        return _records(lexical_search(user_text, k))
+    try:
+        with stage("embed"):
+            q = _embed_one(user_text)
+    except Exception:
+        # embedder down or timed out: degrade to BM25 instead of failing the turn
+        return _records(lexical_search(user_text, k))
+    with stage("search"):
+        return _rank(q, user_text, k)
+
+async def retrieve_snippets_async(user_text: str, k: int = 1):
+    """retrieve_snippets without blocking the event loop on the embedding call."""
+    if not user_text or len(user_text.strip()) < 12:
+        return []
+    if RAG_MODE == "lexical":
+        with stage("search"):
+            return _records(lexical_search(user_text, k))
+    _load_index()
+    if not _vectors_ok:
+        return _records(lexical_search(user_text, k))
+    try:
+        with stage("embed"):
+            q = await _embed_one_async(user_text)
+    except Exception:
+        return _records(lexical_search(user_text, k))
+    with stage("search"):
+        return _rank(q, user_text, k)
+
+def retrieve_context(user_text: str, k: int = 1) -> str:
+    return _format_context(retrieve_snippets(user_text, k))
+
+async def retrieve_context_async(user_text: str, k: int = 1) -> str:
+    return _format_context(await retrieve_snippets_async(user_text, k))
@@ -0,0 +1,94 @@
+# src/mh_core/response_cache.py
+"""
+Cache of final (already filtered) LLM replies for repeated turns.
+
+Check-ins repeat a lot ("im stressed about exams", "cant sleep"). A turn is
+served from cache when the normalised user text, every other prompt message
+(system prompt variant, lexicon notes, retrieved context), the sampling
+parameters and the model are all identical to a recent turn. Crisis turns never
+reach the model and are never cached; neither are error replies or replies
+the output filter replaced.
+
+Settings (env):
+- RESPONSE_CACHE_MAX  max cached replies (default 512; 0 disables)
+- RESPONSE_CACHE_TTL  seconds a reply stays valid (default 600)
+Per request: ChatIn.no_cache = true skips the lookup and the store.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from .cache import TTLCache
+from .safety import BLOCKED_REPLY
+
+_SPACE_RE = re.compile(r"\s+")
+_TRAIL_RE = re.compile(r"[\s.!?,…]+$")
+
+# replies that mean the model call failed, said nothing or was replaced by the output filter
+_UNCACHEABLE = {"", "...", "…", "Sorry, I had trouble thinking just now.", BLOCKED_REPLY}
+
+
+def normalize_user_text(text: str) -> str:
+    """Case, whitespace, curly quotes and trailing punctuation do not change the key."""
+    t = (text or "").lower().replace("’", "'").replace("‘", "'")
+    return _TRAIL_RE.sub("", _SPACE_RE.sub(" ", t).strip())
+
+
+def response_key(messages: List[dict], llm_kwargs: dict, model: str) -> str:
+    """sha256 over the prompt (last user turn normalised), sampling params and model."""
+    *prefix, last = messages
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(json.dumps(llm_kwargs, sort_keys=True).encode("utf-8"))
+    for m in prefix:
+        h.update(b"\0" + m["role"].encode("utf-8") + b"\0" + m["content"].encode("utf-8"))
+    h.update(b"\0user\0" + normalize_user_text(last["content"]).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 512, ttl: float = 600.0):
+        self._cache = TTLCache(max_entries, ttl)
+        self._skipped = 0  # requests that opted out with no_cache
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def put(self, key: str, reply: str) -> bool:
+        if (reply or "").strip() in _UNCACHEABLE:
+            return False
+        self._cache.put(key, reply)
+        return True
+
+    def skipped(self) -> None:
+        with self._lock:
+            self._skipped += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            skipped = self._skipped
+        return dict(self._cache.stats(), skipped=skipped)
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_READY = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide reply cache from env settings, or None when disabled."""
+    global _CACHE, _CACHE_READY
+    if not _CACHE_READY:
+        with _CACHE_LOCK:
+            if not _CACHE_READY:
+                size = int(os.getenv("RESPONSE_CACHE_MAX", "512") or "0")
+                if size > 0:
+                    _CACHE = ResponseCache(size, float(os.getenv("RESPONSE_CACHE_TTL", "600") or "600"))
+                _CACHE_READY = True
+    return _CACHE
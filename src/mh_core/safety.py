@@ -1,10 +1,13 @@
 ﻿# src/mh_core/safety.py
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
-import re, json, pathlib, datetime as dt
+from typing import Optional, Dict, Any, List, Mapping, Sequence, Tuple
+from functools import lru_cache
+import re, json, os, pathlib, threading, datetime as dt
+
+from .content_loader import CONTENT, WatchedFile
 
 # ---------- paths
-ROOT = pathlib.Path(__file__).parent.parent
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 CONTENT_DIR = ROOT / "content"
 SAFE_CONTACTS_PATH = CONTENT_DIR / "crisis_contacts_au.json"
 LOCAL_PATTERNS_PATH = CONTENT_DIR / "crisis_patterns.local.json"
@@ -34,54 +37,265 @@ class SafetyResult:
     contacts: Optional[Dict[str, Any]] = None
 
 # ---------- helpers
+def _parse_local_patterns(text: str) -> List[str]:
+    """Local JSON is a list of regex strings; anything else is ignored."""
+    data = json.loads(text)
+    if isinstance(data, list):
+        return [p for p in data if isinstance(p, str)]
+    return []
+
+_LOCAL_PATTERNS = CONTENT.watch(LOCAL_PATTERNS_PATH.name, parse=_parse_local_patterns, default=[])
+
 def _load_local_patterns() -> List[str]:
     """Optionally extend patterns with local JSON (list of regex strings)."""
-    try:
-        data = json.loads(LOCAL_PATTERNS_PATH.read_text(encoding="utf-8"))
-        if isinstance(data, list):
-            return [p for p in data if isinstance(p, str)]
-    except Exception:
-        pass
-    return []
+    return list(_LOCAL_PATTERNS.get())
+
+# numbered backreferences (\1, (?P=...) is fine) would point at the wrong group once wrapped
+_BACKREF_RE = re.compile(r"\\[1-9]")
+
+class CompiledPatterns:
+    """
+    Built-in + local crisis patterns merged into one alternation.
+    Each source pattern is wrapped in a named group (p0, p1, ...) so a single
+    search() gives both the matched text and which pattern fired.
+    Patterns that cannot live inside the alternation (inline global flags such
+    as (?i), numbered backreferences, clashing group names) are compiled on
+    their own and searched separately, so one such local line never disables
+    screening.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.sources: List[str] = []
+        self.standalone: List[Tuple[int, re.Pattern]] = []  # (source index, regex)
+        seen = set()
+        wrapped: List[Tuple[int, re.Pattern, str]] = []  # (source index, regex alone, wrapped source)
+        for p in patterns:
+            if p in seen:
+                continue
+            try:
+                alone = re.compile(p, flags=re.IGNORECASE)
+            except re.error:
+                continue  # skip broken local entries rather than disable screening
+            seen.add(p)
+            i = len(self.sources)
+            self.sources.append(p)
+            group = f"(?P<p{i}>{p})"
+            try:
+                if _BACKREF_RE.search(p):
+                    raise re.error("numbered backreference")
+                re.compile(group)
+            except re.error:
+                self.standalone.append((i, alone))
+                continue
+            wrapped.append((i, alone, group))
+        try:
+            self.combined = re.compile("|".join(g for _, _, g in wrapped) or r"(?!x)x", flags=re.IGNORECASE)
+        except re.error:
+            # e.g. two local patterns defining the same group name: search each on its own
+            self.combined = re.compile(r"(?!x)x")
+            self.standalone = sorted(self.standalone + [(i, alone) for i, alone, _ in wrapped],
+                                     key=lambda t: t[0])
+
+    def search(self, text: str):
+        """Return (pattern_index, match) for the leftmost hit, or None."""
+        m = self.combined.search(text)
+        best = (int(m.lastgroup[1:]), m) if m else None
+        for i, rx in self.standalone:
+            sm = rx.search(text)
+            if sm and (best is None or (sm.start(), i) < (best[1].start(), best[0])):
+                best = (i, sm)
+        return best
+
+class PatternRegistry:
+    """Compiles the crisis patterns once and rebuilds only when the local JSON changes."""
+
+    def __init__(self, builtins: List[str], local: WatchedFile):
+        self.builtins = list(builtins)
+        self.local = local
+        self._version = -1
+        self._compiled: Optional[CompiledPatterns] = None
+
+    def get(self) -> CompiledPatterns:
+        local = self.local.get()
+        if self._compiled is None or self.local.version != self._version:
+            # Build then swap in one assignment so concurrent readers never see a partial set.
+            compiled = CompiledPatterns(self.builtins + list(local))
+            self._compiled, self._version = compiled, self.local.version
+        return self._compiled
+
+PATTERNS = PatternRegistry(CRISIS_BUILTINS, _LOCAL_PATTERNS)
 
 def _all_patterns() -> List[re.Pattern]:
-    patterns = list(CRISIS_BUILTINS) + _load_local_patterns()
-    return [re.compile(p, flags=re.IGNORECASE) for p in patterns]
+    return [re.compile(p, flags=re.IGNORECASE) for p in PATTERNS.get().sources]
+
+DEFAULT_CONTACTS: Dict[str, Any] = {
+    "emergency": "000",
+    "lifeline": "13 11 14",
+    "kids_helpline": "1800 551 800",
+    "suicide_callback": "1300 659 467",
+    "mensline": "1300 789 978",
+    "beyond_blue": "1300 22 4636",
+    "headspace": "1800 650 890",
+    "qlife": "1800 184 527",
+}
+
+_CONTACTS = CONTENT.watch(SAFE_CONTACTS_PATH.name, default=None)
 
 def load_contacts() -> Dict[str, Any]:
-    try:
-        return json.loads(SAFE_CONTACTS_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        # Fallback AU services
-        return {
-            "emergency": "000",
-            "lifeline": "13 11 14",
-            "kids_helpline": "1800 551 800",
-            "suicide_callback": "1300 659 467",
-            "mensline": "1300 789 978",
-            "beyond_blue": "1300 22 4636",
-            "headspace": "1800 650 890",
-            "qlife": "1800 184 527",
-        }
+    data = _CONTACTS.get()
+    if isinstance(data, Mapping):
+        return dict(data)
+    # Fallback AU services
+    return dict(DEFAULT_CONTACTS)
+
+_MONITOR_RE = re.compile(
+    r"\b(no\s*reason\s*to\s*live|don.?t\s*care\s*if\s*i\s*die|i\s*can.?t\s*go\s*on)\b",
+    flags=re.IGNORECASE,
+)
 
 # ---------- main API used by the gateway
 def assess_message(text: str) -> SafetyResult:
     if not text:
         return SafetyResult(level="none", trigger=None)
 
-    # Crisis check
-    for cre in _all_patterns():
-        m = cre.search(text)
-        if m:
-            return SafetyResult(level="crisis", trigger=m.group(0), contacts=load_contacts())
+    # Crisis check (one pass over the combined matcher)
+    hit = PATTERNS.get().search(text)
+    if hit:
+        _, m = hit
+        return SafetyResult(level="crisis", trigger=m.group(0), contacts=load_contacts())
 
     # Passive-ideation / monitoring tier (generic)
-    if re.search(r"\b(no\s*reason\s*to\s*live|don.?t\s*care\s*if\s*i\s*die|i\s*can.?t\s*go\s*on)\b",
-                 text, flags=re.IGNORECASE):
+    if _MONITOR_RE.search(text):
         return SafetyResult(level="monitor", trigger="passive_ideation")
 
     return SafetyResult(level="none", trigger=None)
 
+# ---------- batch screening (transcript re-screens, /screen/batch, audit)
+@dataclass
+class ScreenResult:
+    level: str                          # 'none' | 'monitor' | 'crisis'
+    trigger: Optional[str]              # same as SafetyResult.trigger
+    span: Optional[Tuple[int, int]]     # character offsets of the match in the message
+    pattern: Optional[int] = None       # index into the crisis pattern sources
+
+_SCREEN_CHUNK = 2000  # messages per process-pool task
+
+def _screen(compiled: CompiledPatterns, texts: Sequence[str]) -> List[ScreenResult]:
+    # bound methods hoisted out of the loop; one combined search per tier per message
+    crisis_search, monitor_search = compiled.search, _MONITOR_RE.search
+    out: List[ScreenResult] = []
+    append = out.append
+    for text in texts:
+        if not text:
+            append(ScreenResult("none", None, None))
+            continue
+        hit = crisis_search(text)
+        if hit:
+            i, m = hit
+            append(ScreenResult("crisis", m.group(0), m.span(), i))
+            continue
+        m = monitor_search(text)
+        if m:
+            append(ScreenResult("monitor", "passive_ideation", m.span()))
+        else:
+            append(ScreenResult("none", None, None))
+    return out
+
+@lru_cache(maxsize=4)
+def _compiled_for(sources: Tuple[str, ...]) -> CompiledPatterns:
+    return CompiledPatterns(list(sources))
+
+def _screen_chunk(args: Tuple[Tuple[str, ...], List[str]]) -> List[ScreenResult]:
+    """Process-pool entry point: compile the parent's pattern set once per worker."""
+    sources, texts = args
+    return _screen(_compiled_for(sources), texts)
+
+# server-side process-pool size for large batches (0/1 = in-process), never above the core count
+SCREEN_WORKERS = min(int(os.getenv("SCREEN_WORKERS", "0") or "0"), os.cpu_count() or 1)
+_POOL = None  # ProcessPoolExecutor, started on the first large batch and reused
+_POOL_LOCK = threading.Lock()
+
+def _screen_pool():
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                from concurrent.futures import ProcessPoolExecutor
+                _POOL = ProcessPoolExecutor(max_workers=SCREEN_WORKERS)
+    return _POOL
+
+def screen_batch(texts: Sequence[str]) -> List[ScreenResult]:
+    """
+    Screen many messages with the same tiers as assess_message (crisis, then
+    monitor), resolving the live pattern set once for the whole batch and
+    skipping the per-message contacts lookup. With SCREEN_WORKERS > 1, large
+    batches are split across one shared process pool; every worker uses the
+    pattern set that is live in this process.
+    """
+    texts = list(texts)
+    compiled = PATTERNS.get()
+    if SCREEN_WORKERS <= 1 or len(texts) <= _SCREEN_CHUNK:
+        return _screen(compiled, texts)
+    sources = tuple(compiled.sources)
+    chunks = [(sources, texts[i:i + _SCREEN_CHUNK]) for i in range(0, len(texts), _SCREEN_CHUNK)]
+    return [r for part in _screen_pool().map(_screen_chunk, chunks) for r in part]
+
+# ---------- output filter (normal chat only; crisis replies carry helplines on purpose)
+BLOCKED_REPLY = "Here are a couple of ideas that might help right now."
+_OUTPUT_BLOCK_TERMS = (" call ", " phone ", "000", "1800", "13 ")
+_OUTPUT_HOLDBACK = max(len(t) for t in _OUTPUT_BLOCK_TERMS) - 1
+
+def _has_blocked_term(text: str) -> bool:
+    low = (text or "").lower()
+    return any(w in low for w in _OUTPUT_BLOCK_TERMS)
+
+def filter_reply(reply: str) -> str:
+    """Replace a model reply that mentions phone numbers / calling with a neutral line."""
+    if _has_blocked_term(reply):
+        return BLOCKED_REPLY
+    return reply
+
+class StreamingReplyFilter:
+    """
+    Incremental version of filter_reply for streamed replies.
+    feed() returns the text that is safe to show now; the last few characters are
+    held back so a blocked term is never partially shown. Once a term is seen,
+    `blocked` is set and nothing more is released.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._sent = 0
+        self.blocked = False
+
+    def feed(self, piece: str) -> str:
+        if self.blocked or not piece:
+            return ""
+        self._text += piece
+        # only the unsent tail (plus overlap) can contain a new hit
+        if _has_blocked_term(self._text[max(0, self._sent - _OUTPUT_HOLDBACK):]):
+            self.blocked = True
+            return ""
+        end = max(self._sent, len(self._text) - _OUTPUT_HOLDBACK)
+        out = self._text[self._sent:end]
+        self._sent = end
+        return out
+
+    def finish(self) -> str:
+        """Release the held-back tail at end of stream."""
+        if self.blocked:
+            return ""
+        out = self._text[self._sent:]
+        self._sent = len(self._text)
+        return out
+
+    @property
+    def reply(self) -> str:
+        """Final reply text, matching what the non-streaming path would return."""
+        if self.blocked:
+            return BLOCKED_REPLY
+        return self._text.strip() or "..."
+
 
 # Override crisis text with plain English, no slang or contractions
 def crisis_opening(name: Optional[str], contacts: Dict[str, Any]) -> str:  # type: ignore[override]
@@ -0,0 +1,179 @@
+# src/mh_core/sessions.py
+"""
+Optional server-side session store for ChatState.
+
+With a store enabled the client sends only `session_id`; the server keeps the
+state between turns instead of receiving and validating it on every request.
+Nothing beyond ChatState is stored (no message text), sessions expire after
+SESSION_TTL seconds of inactivity and the store is bounded by SESSION_MAX.
+
+Settings (env):
+- SESSION_STORE    off (default; state round-trips as before) | memory | sqlite
+- SESSION_TTL      idle expiry in seconds (default 3600)
+- SESSION_MAX      max live sessions; least recently used are evicted (default 10000)
+- SESSION_DB_PATH  sqlite file (default content/cache/sessions.sqlite3), shared by workers
+"""
+from __future__ import annotations
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional
+
+from .cache import TTLCache
+from .models import ChatState
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[2] / "content" / "cache" / "sessions.sqlite3"
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class SessionStore(ABC):
+    """Interface: get/put/delete ChatState by session id."""
+
+    backend = "none"
+    blocking = False  # True when calls do disk I/O; async callers then run them in a thread
+
+    @abstractmethod
+    def get(self, sid: str) -> Optional[ChatState]: ...
+
+    @abstractmethod
+    def put(self, sid: str, state: ChatState) -> None: ...
+
+    @abstractmethod
+    def delete(self, sid: str) -> None: ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, float]: ...
+
+    def create(self, state: Optional[ChatState] = None) -> str:
+        sid = new_session_id()
+        self.put(sid, state or ChatState())
+        return sid
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process LRU + TTL; fine for a single worker."""
+
+    backend = "memory"
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600.0):
+        self._cache = TTLCache(max_sessions, ttl)
+
+    def get(self, sid: str) -> Optional[ChatState]:
+        state = self._cache.get(sid)
+        # hand out a copy: the handler mutates it and stores it back with put()
+        return state.model_copy(deep=True) if state is not None else None
+
+    def put(self, sid: str, state: ChatState) -> None:
+        self._cache.put(sid, state)
+
+    def delete(self, sid: str) -> None:
+        self._cache.pop(sid)
+
+    def stats(self) -> Dict[str, float]:
+        return dict(self._cache.stats(), backend=self.backend)
+
+
+class SQLiteSessionStore(SessionStore):
+    """One small JSON row per session in a WAL database, so several workers share sessions."""
+
+    backend = "sqlite"
+    blocking = True
+
+    def __init__(self, path: Path, max_sessions: int = 10000, ttl: float = 3600.0):
+        self.path = Path(path)
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = float(ttl)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated)")
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        # upper bound on rows (replaces count as inserts); COUNT(*) runs only when it passes the limit
+        self._rows = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, sid: str) -> Optional[ChatState]:
+        with self._lock:
+            row = self._db.execute("SELECT state, updated FROM sessions WHERE id=?", (sid,)).fetchone()
+            if row is not None and time.time() - row[1] > self.ttl:
+                self._db.execute("DELETE FROM sessions WHERE id=?", (sid,))
+                self._stats["expirations"] += 1
+                row = None
+            self._stats["hits" if row else "misses"] += 1
+        return ChatState.model_validate_json(row[0]) if row else None
+
+    def put(self, sid: str, state: ChatState) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions(id, state, updated) VALUES (?,?,?)",
+                (sid, state.model_dump_json(), time.time()),
+            )
+            self._rows += 1
+            if self._rows > self.max_sessions:
+                self._evict_locked()
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id=?", (sid,))
+
+    def _evict_locked(self) -> None:
+        count = self._rows = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        if count <= self.max_sessions:
+            return
+        cur = self._db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+        self._stats["expirations"] += cur.rowcount
+        count -= cur.rowcount
+        if count > self.max_sessions:
+            # trim to 90% so eviction does not run on every insert at the bound
+            drop = count - int(self.max_sessions * 0.9)
+            self._db.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated LIMIT ?)", (drop,)
+            )
+            self._stats["evictions"] += drop
+            count -= drop
+        self._rows = count
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["entries"] = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        out["max_entries"] = self.max_sessions
+        out["ttl"] = self.ttl
+        return dict(out, backend=self.backend)
+
+
+_STORE: Optional[SessionStore] = None
+_STORE_READY = False
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> Optional[SessionStore]:
+    """Process-wide store from env settings, or None when server-side sessions are off."""
+    global _STORE, _STORE_READY
+    if not _STORE_READY:
+        with _STORE_LOCK:
+            if not _STORE_READY:
+                kind = os.getenv("SESSION_STORE", "off").strip().lower()
+                ttl = float(os.getenv("SESSION_TTL", "3600") or "3600")
+                max_sessions = int(os.getenv("SESSION_MAX", "10000") or "10000")
+                if kind == "memory":
+                    _STORE = MemorySessionStore(max_sessions, ttl)
+                elif kind == "sqlite":
+                    raw = os.getenv("SESSION_DB_PATH", "")
+                    _STORE = SQLiteSessionStore(Path(raw) if raw else DEFAULT_DB_PATH, max_sessions, ttl)
+                _STORE_READY = True
+    return _STORE
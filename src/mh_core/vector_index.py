@@ -0,0 +1,115 @@
+# src/mh_core/vector_index.py
+"""
+On-disk vector index used by rag.py.
+
+Vectors are stored as a plain .npy file so they can be memory-mapped read-only
+(np.load(..., mmap_mode="r")); every uvicorn worker then shares one page-cache
+copy instead of holding its own float32 array.
+
+Supported storage dtypes:
+- float32  exact (the original format; old index files load unchanged)
+- float16  half the size, ~3 significant digits
+- int8     a quarter of the size; each row stored as round(v / scale) with a
+           per-vector float32 scale = max|v| / 127 in <stem>_scales.npy
+
+float32 is scored with one matmul. float16/int8 are scored block by block,
+so at most `block` rows are widened to float32 at once and the full matrix
+is never copied.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+
+def scales_path(vectors_path: Path) -> Path:
+    vectors_path = Path(vectors_path)
+    return vectors_path.with_name(vectors_path.stem + "_scales.npy")
+
+
+def quantize(vecs: np.ndarray, dtype: str = "float32") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Return (data, scales) for the requested storage dtype; scales is None unless int8."""
+    vecs = np.asarray(vecs, dtype=np.float32)
+    if dtype == "float32":
+        return vecs, None
+    if dtype == "float16":
+        return vecs.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vecs).max(axis=1) / 127.0 if vecs.size else np.zeros(len(vecs), np.float32)
+        safe = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        data = np.clip(np.rint(vecs / safe[:, None]), -127, 127).astype(np.int8)
+        return data, scales.astype(np.float32)
+    raise ValueError(f"Unsupported index dtype {dtype!r}; expected one of {DTYPES}")
+
+
+class VectorIndex:
+    def __init__(self, data: np.ndarray, scales: Optional[np.ndarray] = None, block: int = 2048):
+        self.data = data
+        self.scales = scales
+        self.block = block
+
+    @property
+    def dtype(self) -> str:
+        return str(self.data.dtype)
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    @classmethod
+    def from_vectors(cls, vecs: np.ndarray, dtype: str = "float32") -> "VectorIndex":
+        return cls(*quantize(vecs, dtype))
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "VectorIndex":
+        path = Path(path)
+        mode = "r" if mmap else None
+        data = np.load(path, mmap_mode=mode)
+        scales = None
+        if data.dtype == np.int8:
+            scales = np.load(scales_path(path), mmap_mode=mode)
+        return cls(data, scales)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        np.save(path, self.data)
+        if self.scales is not None:
+            np.save(scales_path(path), self.scales)
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        """Dot product of every stored vector with q (float32, one score per row)."""
+        q = np.asarray(q, dtype=np.float32)
+        n = len(self)
+        if self.data.dtype == np.float32:
+            return np.asarray(self.data @ q)
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.block):
+            stop = min(start + self.block, n)
+            chunk = self.data[start:stop]
+            if chunk.dtype != np.float32:
+                chunk = chunk.astype(np.float32)
+            out[start:stop] = chunk @ q
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def scores_for(self, q: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Scores for a subset of rows only (gathers just those rows)."""
+        q = np.asarray(q, dtype=np.float32)
+        chunk = np.asarray(self.data[rows])
+        if chunk.dtype != np.float32:
+            chunk = chunk.astype(np.float32)
+        out = chunk @ q
+        if self.scales is not None:
+            out *= self.scales[rows]
+        return out
+
+    def vector(self, i: int) -> np.ndarray:
+        """Row i as float32 (dequantised)."""
+        v = np.asarray(self.data[i], dtype=np.float32)
+        if self.scales is not None:
+            v = v * self.scales[i]
+        return v
@@ -0,0 +1,24 @@
+# tests/conftest.py
+import weakref
+from collections import OrderedDict
+
+import pytest
+
+from mh_core import ai_gateway, embed_cache, http_pool, rag
+from mh_core.mock_ollama import MockOllama
+
+
+@pytest.fixture
+def mock_ollama(monkeypatch):
+    """A running mock Ollama that the gateway, RAG and API talk to instead of 127.0.0.1:11434."""
+    with MockOllama() as mock:
+        monkeypatch.setattr(ai_gateway, "OLLAMA_HOST", mock.host)
+        monkeypatch.setattr(ai_gateway, "OLLAMA_PORT", mock.port)
+        # async clients are cached per loop with the old base_url
+        monkeypatch.setattr(http_pool, "_ASYNC_CLIENTS", weakref.WeakKeyDictionary())
+        # mock vectors must never reach the real on-disk embedding cache (or outlive the test in memory)
+        monkeypatch.setattr(embed_cache, "_CACHE", None)
+        monkeypatch.setattr(embed_cache, "_CACHE_DISABLED", True)
+        monkeypatch.setattr(rag, "_embed_cache", OrderedDict())
+        monkeypatch.setattr(rag, "_backend", None)
+        yield mock
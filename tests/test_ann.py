@@ -0,0 +1,52 @@
+# tests/test_ann.py
+import numpy as np
+
+from mh_core import rag
+from mh_core.ann import IVFIndex
+from mh_core.vector_index import VectorIndex
+
+def _clustered(n=3000, dim=32, topics=20, seed=5):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim))
+    v = centres[rng.integers(topics, size=n)] + 0.3 * rng.standard_normal((n, dim))
+    return (v / np.linalg.norm(v, axis=1, keepdims=True)).astype("float32")
+
+def test_ivf_cells_cover_every_row_once():
+    vecs = _clustered()
+    ivf = IVFIndex.build(vecs, nlist=40)
+    assert ivf.nlist == 40
+    assert sorted(ivf.order.tolist()) == list(range(len(vecs)))
+    assert ivf.offsets[0] == 0 and ivf.offsets[-1] == len(vecs)
+
+def test_ivf_recall_grows_with_nprobe_and_is_exact_at_nlist(tmp_path):
+    vecs = _clustered()
+    index = VectorIndex(vecs)
+    ivf = IVFIndex.build(vecs, nlist=40)
+    ivf.save(tmp_path / "ivf.npz")
+    ivf = IVFIndex.load(tmp_path / "ivf.npz")
+    rng = np.random.default_rng(1)
+    queries = vecs[rng.integers(len(vecs), size=50)]
+    def recall(nprobe):
+        hits = 0
+        for q in queries:
+            exact = set(rag._top_k(vecs @ q, 5))
+            hits += len(exact & set(ivf.search(index, q, 5, nprobe)[0]))
+        return hits / (5 * len(queries))
+    assert recall(1) <= recall(8) <= recall(40) == 1.0
+    assert recall(8) >= 0.9
+
+def test_ivf_scores_quantised_rows(tmp_path):
+    vecs = _clustered(n=500)
+    VectorIndex.from_vectors(vecs, "int8").save(tmp_path / "v.npy")
+    index = VectorIndex.load(tmp_path / "v.npy", mmap=True)
+    ivf = IVFIndex.build(vecs, nlist=10)
+    rows, scores = ivf.search(index, vecs[7], 3, nprobe=10)
+    assert rows[0] == 7
+    assert np.allclose(scores, vecs[rows] @ vecs[7], atol=0.02)
+
+def test_rag_search_uses_ivf_when_loaded(monkeypatch):
+    vecs = _clustered(n=400)
+    monkeypatch.setattr(rag, "_index", VectorIndex(vecs))
+    monkeypatch.setattr(rag, "_ivf", IVFIndex.build(vecs, nlist=8))
+    monkeypatch.setattr(rag, "_meta", [{"id": str(i), "text": "t", "topic": ""} for i in range(400)])
+    assert rag.search(vecs[42], k=1, nprobe=8)[0][0] == 42
@@ -1,4 +1,5 @@
 # tests/test_chat.py
+import pytest
 from fastapi.testclient import TestClient
 from mh_core.api import app
 from mh_core.models import ChatState
@@ -6,6 +7,9 @@ from mh_core.crisis import contains_crisis_signal
 
 client = TestClient(app)
 
+# no real Ollama needed: the model replies come from mh_core.mock_ollama
+pytestmark = pytest.mark.usefixtures("mock_ollama")
+
 def test_health():
     r = client.get("/health")
     assert r.status_code == 200
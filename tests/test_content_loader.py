@@ -0,0 +1,53 @@
+# tests/test_content_loader.py
+import json
+import os
+
+import pytest
+
+from mh_core.content_loader import ContentRegistry
+
+def _bump_mtime(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+def test_registry_serves_frozen_snapshots_without_disk_io(tmp_path, monkeypatch):
+    (tmp_path / "pack.json").write_text(json.dumps({"strings": {"hi": "g'day"}, "list": [1, 2]}), encoding="utf-8")
+    reg = ContentRegistry(tmp_path, reload_every=0)
+    wf = reg.watch("pack.json", default={})
+    snap = reg.get("pack.json")
+    assert snap["strings"]["hi"] == "g'day" and snap["list"] == (1, 2)
+    with pytest.raises(TypeError):
+        snap["strings"]["hi"] = "x"
+    assert reg.watch("pack.json") is wf
+
+    def no_io(*a, **kw):
+        raise AssertionError("hot path touched the disk")
+    monkeypatch.setattr(type(tmp_path), "stat", no_io)
+    monkeypatch.setattr(type(tmp_path), "read_bytes", no_io)
+    for _ in range(3):
+        assert reg.get("pack.json") is snap
+
+def test_refresh_swaps_only_when_content_hash_changes(tmp_path):
+    path = tmp_path / "contacts.json"
+    path.write_text(json.dumps({"lifeline": "13 11 14"}), encoding="utf-8")
+    reg = ContentRegistry(tmp_path, reload_every=0)
+    reg.watch("contacts.json")
+    first = reg.get("contacts.json")
+
+    _bump_mtime(path)  # touched, same bytes
+    assert reg.refresh() == []
+    assert reg.get("contacts.json") is first
+
+    path.write_text(json.dumps({"lifeline": "13 11 15"}), encoding="utf-8")
+    _bump_mtime(path)
+    assert reg.refresh() == ["contacts.json"]
+    assert reg.get("contacts.json")["lifeline"] == "13 11 15"
+    assert reg.status()["contacts.json"]["version"] == 2
+
+def test_missing_or_broken_files_fall_back_to_default(tmp_path):
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    reg = ContentRegistry(tmp_path, reload_every=0)
+    reg.watch("broken.json", default=[])
+    reg.watch("missing.json", default=None)
+    assert reg.get("broken.json") == () and reg.get("missing.json") is None
+    assert reg.status()["missing.json"]["present"] is False
@@ -0,0 +1,34 @@
+# tests/test_culture.py
+import time
+
+from mh_core.culture import Lexicon, normalize_for_retrieval
+
+def test_whole_words_longest_match_single_pass():
+    out, notes = normalize_for_retrieval("Deadly yarn up with my mob about my mobile, then YARNING")
+    assert out == ("excellent or very good talk further or in more detail with my "
+                   "community or extended family group about my mobile, then talking or having a conversation")
+    assert notes == [
+        "deadly -> excellent or very good",
+        "yarn up -> talk further or in more detail",
+        "mob -> community or extended family group",
+        "yarning -> talking or having a conversation",
+    ]
+
+def test_repeats_noted_once_and_punctuation_is_a_boundary():
+    out, notes = normalize_for_retrieval("grog, more grog... (grog)")
+    assert out == "alcohol, more alcohol... (alcohol)"
+    assert notes == ["grog -> alcohol"]
+    assert normalize_for_retrieval("") == ("", [])
+    assert normalize_for_retrieval("nothing here") == ("nothing here", [])
+
+def test_groups_and_scale():
+    terms = [{"phrase": f"word{i}", "meaning": f"m{i}", "group": f"g{i % 7}"} for i in range(5000)]
+    terms.append({"phrase": "word1", "meaning": "duplicate ignored", "group": "other"})
+    lex = Lexicon(terms)
+    assert len(lex) == 5000
+    text = " ".join(f"word{i}" for i in range(0, 5000, 97)) + " word12345"
+    t0 = time.perf_counter()
+    out, notes = lex.normalize(text)
+    assert time.perf_counter() - t0 < 0.05
+    assert out.startswith("m0 m97 ") and out.endswith(" word12345")
+    assert lex.normalize("word1")[0] == "m1"
@@ -0,0 +1,52 @@
+# tests/test_embed_cache.py
+import sqlite3
+
+import numpy as np
+import pytest
+
+from mh_core.embed_cache import EmbeddingCache, cache_key
+
+def test_roundtrip_and_counters(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3")
+    v = np.arange(4, dtype=np.float32)
+    assert cache.get("m", "hello") is None
+    cache.put("m", "hello", v)
+    assert np.array_equal(cache.get("m", "hello"), v)
+    assert cache.get("other-model", "hello") is None  # key includes the model
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["entries"]) == (1, 2, 1)
+
+def test_shared_across_instances(tmp_path):
+    path = tmp_path / "emb.sqlite3"
+    EmbeddingCache(path).put_many("m", {"a": np.ones(3, np.float32), "b": np.zeros(3, np.float32)})
+    again = EmbeddingCache(path)  # e.g. after a restart or in another worker
+    found = again.get_many("m", ["a", "b", "c"])
+    assert set(found) == {"a", "b"}
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3", max_entries=10)
+    for i in range(10):
+        cache.put("m", f"t{i}", np.full(2, i, np.float32))
+    cache._db.execute("UPDATE embeddings SET last_used = 0")  # make t0..t9 old
+    cache._db.execute("UPDATE embeddings SET last_used = 1 WHERE key = ?", (cache_key("m", "t9"),))
+    cache.put("m", "new", np.ones(2, np.float32))
+    assert len(cache) <= 10
+    assert cache.stats()["evictions"] >= 1
+    assert cache.get("m", "new") is not None
+    assert cache.get("m", "t9") is not None
+
+def test_failed_write_rolls_back_and_cache_stays_usable(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3")
+    cache._db.execute("CREATE TRIGGER reject BEFORE INSERT ON embeddings WHEN NEW.model = 'bad' "
+                      "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+    with pytest.raises(sqlite3.IntegrityError):
+        cache.put("bad", "x", np.ones(2, np.float32))
+    assert not cache._db.in_transaction
+    cache.put("m", "ok", np.ones(2, np.float32))
+    assert cache.get("m", "ok") is not None and len(cache) == 1
+
+def test_rows_of_another_width_are_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3")
+    cache.put("nomic-embed-text", "hi", np.ones(512, np.float32))  # e.g. written by a mock server
+    assert cache.get("nomic-embed-text", "hi", dim=768) is None
+    assert cache.get("nomic-embed-text", "hi", dim=512) is not None
@@ -0,0 +1,106 @@
+# tests/test_embeddings.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from mh_core import embeddings, http_pool
+
+
+class _EmbedServer(BaseHTTPRequestHandler):
+    """Stand-in for Ollama's /api/embed: vector = [len(text), index in batch]."""
+    protocol_version = "HTTP/1.1"
+    fail_first = 0
+    batches = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            cls = type(self)
+            if cls.fail_first > 0:
+                cls.fail_first -= 1
+                return self._reply(500, {"error": "busy"})
+            cls.batches.append(list(payload["input"]))
+        self._reply(200, {"embeddings": [[float(len(t)), float(i)] for i, t in enumerate(payload["input"])]})
+
+    def _reply(self, status, obj):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def embed_server(monkeypatch):
+    _EmbedServer.fail_first = 0
+    _EmbedServer.batches = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _EmbedServer)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    pool = http_pool.ConnectionPool("127.0.0.1", srv.server_address[1])
+    monkeypatch.setattr(embeddings, "ollama_pool", lambda: pool)
+    yield _EmbedServer
+    srv.shutdown()
+
+def test_embed_many_batches_concurrently_and_keeps_order(embed_server):
+    texts = [f"snippet {'x' * i}" for i in range(23)]
+    seen = []
+    vecs = embeddings.embed_many(texts, "m", batch_size=5, workers=3,
+                                 progress=lambda done, total, elapsed: seen.append((done, total)))
+    assert len(embed_server.batches) == 5
+    assert [v[0] for v in vecs] == [float(len(t)) for t in texts]
+    assert seen[-1] == (23, 23) and len(seen) == 5
+
+def test_embed_many_retries_failed_batches(embed_server):
+    embed_server.fail_first = 2
+    vecs = embeddings.embed_many(["a", "bb"], "m", batch_size=2, workers=1, retries=3, backoff=0)
+    assert np.allclose(np.stack(vecs), [[1, 0], [2, 1]])
+
+def test_embed_many_gives_up_after_retries(embed_server):
+    embed_server.fail_first = 10
+    with pytest.raises(embeddings.EmbedError):
+        embeddings.embed_many(["a"], "m", retries=1, backoff=0)
+
+
+def test_hashing_embedder_is_deterministic_and_similarity_aware():
+    e = embeddings.HashingEmbedder(dim=256)
+    a = e.embed_query("I can't sleep before exams")
+    assert np.array_equal(a, embeddings.HashingEmbedder(dim=256).embed_query("I can't sleep before exams"))
+    assert a.shape == (256,) and abs(np.linalg.norm(a) - 1) < 1e-5
+    close = e.embed_query("cannot sleep, exams soon")
+    far = e.embed_query("yarning with my nan on country")
+    assert a @ close > a @ far
+    assert e.name == "hashing-256-3.4.5" and not e.cacheable
+
+
+def test_parse_embedding_has_no_random_fallback():
+    assert embeddings.parse_embedding(b'{"embedding": [3, 4]}').tolist() == [3, 4]
+    assert embeddings.parse_embedding(b'{"embeddings": [[1, 2]]}').tolist() == [1, 2]
+    for bad in (b'{"error": "model not found"}', b"not json", b'{"embedding": []}'):
+        with pytest.raises(embeddings.EmbedError):
+            embeddings.parse_embedding(bad)
+
+
+def test_get_embedder_from_env(monkeypatch):
+    monkeypatch.setenv("EMBED_BACKEND", "hashing")
+    monkeypatch.setenv("EMBED_HASH_DIM", "128")
+    assert embeddings.get_embedder().dim == 128
+    assert embeddings.get_embedder("ollama").name == "nomic-embed-text"
+    with pytest.raises(ValueError):
+        embeddings.get_embedder("word2vec")
+
+
+def test_ollama_embedder_passes_its_timeout_to_batches(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(embeddings, "embed_many", lambda texts, model, **kw: seen.update(kw) or [])
+    embeddings.get_embedder("ollama", timeout=3.5).embed(["a"])
+    assert seen["timeout"] == 3.5
+    with pytest.raises(TypeError):
+        embeddings.Embedder()  # abstract
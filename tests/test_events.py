@@ -0,0 +1,63 @@
+# tests/test_events.py
+import io
+import json
+import threading
+
+from mh_core import crisis, events
+from mh_core.events import EventLog
+
+def test_events_are_batched_as_json_lines(tmp_path):
+    path = tmp_path / "crisis.jsonl"
+    log = EventLog(path, batch_size=50)
+    for i in range(120):
+        assert log.emit("crisis_detected", pattern=f"crisis.p{i % 3}")
+    assert log.flush()
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) == 120 and rows[0]["pattern"] == "crisis.p0" and rows[0]["ts"].endswith("+00:00")
+    st = log.stats()
+    assert st["written"] == 120 and st["dropped"] == 0 and st["batches"] >= 3
+    log.close()
+
+def test_counters_stay_exact_under_concurrent_emits():
+    sink = io.StringIO()
+    log = EventLog(sink, max_queue=100000)
+    def burst():
+        for _ in range(2000):
+            log.emit("crisis_detected", pattern="crisis.p0")
+    threads = [threading.Thread(target=burst) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert log.flush()
+    st = log.stats()
+    assert st["emitted"] == st["written"] == 16000 and st["dropped"] == 0
+    log.close()
+
+class _SlowSink(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def write(self, s):
+        self.gate.wait(5)
+        return super().write(s)
+
+def test_full_buffer_drops_instead_of_blocking():
+    sink = _SlowSink()
+    log = EventLog(sink, max_queue=2, batch_size=1)
+    results = [log.emit("crisis_detected", pattern="crisis.p0") for _ in range(10)]
+    assert not all(results) and log.stats()["dropped"] == results.count(False)
+    sink.gate.set()
+    log.close()
+    assert sink.getvalue().count("\n") == log.stats()["written"] == results.count(True)
+
+def test_detection_logs_pattern_id_not_user_text(monkeypatch):
+    sink = io.StringIO()
+    log = EventLog(sink)
+    monkeypatch.setattr(crisis, "get_event_log", lambda: log)
+    assert crisis.contains_crisis_signal("honestly i want to die tonight")
+    log.close()
+    rec = json.loads(sink.getvalue())
+    assert rec["event"] == "crisis_detected" and rec["pattern"] == "crisis.p6"
+    assert "die" not in sink.getvalue()
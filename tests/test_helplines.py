@@ -0,0 +1,28 @@
+# tests/test_helplines.py
+import json
+
+from mh_core import crisis
+from mh_core.content_loader import ContentRegistry
+from mh_core.safety import DEFAULT_CONTACTS
+
+def test_support_lines_are_prebuilt_from_memory(monkeypatch):
+    lines = crisis.support_lines()
+    assert "- 13YARN: 13 92 76" in lines and "- Lifeline: 13 11 14" in lines
+    block = crisis._block()
+    assert crisis._block() is block  # no rebuild while the contacts are unchanged
+    msgs = crisis.helpline_messages()
+    assert msgs[2:] == lines and msgs[1].startswith("If you want to talk")
+
+def test_rebuilt_on_change_and_defaults_when_missing(tmp_path, monkeypatch):
+    reg = ContentRegistry(tmp_path, reload_every=0)
+    monkeypatch.setattr(crisis, "CONTENT", reg)
+    monkeypatch.setattr(crisis, "_BLOCKS", {})
+
+    # no crisis_contacts_nz.json: built-in defaults, never an empty block
+    assert "- Lifeline: " + DEFAULT_CONTACTS["lifeline"] in crisis.support_lines("nz")
+
+    path = tmp_path / "crisis_contacts_nz.json"
+    path.write_text(json.dumps({"emergency": "111", "lifeline": "0800 543 354"}), encoding="utf-8")
+    reg.refresh()
+    assert crisis.support_lines("nz") == ["- Emergency: 111", "- Lifeline: 0800 543 354"]
+    assert crisis.support_lines("NZ", "fr") == crisis.support_lines("nz")  # unknown locale -> en labels
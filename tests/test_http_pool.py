@@ -0,0 +1,58 @@
+# tests/test_http_pool.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mh_core.http_pool import ConnectionPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def test_pool_reuses_keepalive_connection():
+    srv = _serve()
+    try:
+        pool = ConnectionPool("127.0.0.1", srv.server_address[1], maxsize=2)
+        for i in range(5):
+            status, raw = pool.request("GET", f"/x{i}", timeout=5)
+            assert status == 200
+            assert json.loads(raw)["path"] == f"/x{i}"
+        st = pool.stats()
+        assert st["requests"] == 5
+        assert st["created"] == 1
+        assert st["reused"] == 4
+        assert st["idle"] == 1
+        pool.close()
+        assert pool.stats()["idle"] == 0
+    finally:
+        srv.shutdown()
+
+def test_pool_discards_expired_idle_connections():
+    srv = _serve()
+    try:
+        pool = ConnectionPool("127.0.0.1", srv.server_address[1], idle_timeout=0)
+        pool.request("GET", "/a", timeout=5)
+        pool.request("GET", "/b", timeout=5)
+        st = pool.stats()
+        assert st["created"] == 2
+        assert st["reused"] == 0
+        assert st["discarded"] >= 1
+    finally:
+        srv.shutdown()
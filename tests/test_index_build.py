@@ -0,0 +1,106 @@
+# tests/test_index_build.py
+import json
+
+import numpy as np
+
+from mh_core.ann import IVFIndex, ivf_path
+from mh_core.lexical import LexicalIndex, lexical_path
+from mh_core.index_build import build_index, index_dir, load_manifest, manifest_path, resolve_index
+from mh_core.vector_index import VectorIndex
+
+def _fake_embedder(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [np.array([len(t), t.count(" ") + 1, 1.0], dtype=np.float32) for t in texts]
+    return embed
+
+def _items(*pairs):
+    return [{"id": i, "text": t, "topic": ""} for i, t in pairs]
+
+def test_incremental_build_embeds_only_new_or_changed(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    calls = []
+    embed = _fake_embedder(calls)
+
+    first = build_index(_items(("a", "one"), ("b", "two words"), ("c", "three more words")), embed, vecs, meta, model="m")
+    assert first["embedded"] == 3 and calls == [["one", "two words", "three more words"]]
+    full = VectorIndex.load(resolve_index(vecs, meta)[0])
+
+    calls.clear()
+    counts = build_index(_items(("a", "one"), ("c", "three more words, edited"), ("d", "new")), embed, vecs, meta,
+                         model="m", incremental=True)
+    assert calls == [["three more words, edited", "new"]]
+    # c was edited, not removed: only b counts as dropped
+    assert counts == {"total": 3, "reused": 1, "embedded": 2, "dropped": 1}
+    cur_vecs, cur_meta = resolve_index(vecs, meta)
+    idx = VectorIndex.load(cur_vecs)
+    assert len(idx) == 3
+    assert np.allclose(idx.vector(0), full.vector(0))
+    assert [m["id"] for m in json.loads(cur_meta.read_text())] == ["a", "c", "d"]
+    assert [r["id"] for r in load_manifest(manifest_path(cur_vecs))["records"]] == ["a", "c", "d"]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+def test_builds_are_published_by_one_pointer_swap(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    assert resolve_index(vecs, meta) == (vecs, meta)  # nothing published: flat legacy paths
+    builds = []
+    for n in range(3):
+        build_index(_items(*[(str(i), "text %d" % i) for i in range(n + 1)]), _fake_embedder([]), vecs, meta,
+                    model="m", ann_nlist=0)
+        builds.append(resolve_index(vecs, meta)[0].parent)
+    assert len(set(builds)) == 3 and not vecs.exists()
+    # a reader pinned to the previous build still finds every file of that build
+    assert len(VectorIndex.load(builds[1] / vecs.name)) == 2
+    assert len(json.loads((builds[1] / meta.name).read_text())) == 2
+    assert len(LexicalIndex.load(lexical_path(builds[1] / vecs.name))) == 2
+    # older builds are pruned, the current and previous one are kept
+    assert sorted(p for p in index_dir(vecs).iterdir() if p.is_dir()) == sorted(builds[1:])
+
+def test_failed_build_keeps_the_published_one(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    build_index(_items(("a", "one")), _fake_embedder([]), vecs, meta, model="m")
+    before = resolve_index(vecs, meta)
+
+    def broken(texts):
+        raise ConnectionError("model server down")
+    try:
+        build_index(_items(("a", "one"), ("b", "two")), broken, vecs, meta, model="m", incremental=True)
+    except ConnectionError:
+        pass
+    assert resolve_index(vecs, meta) == before
+    assert [p for p in index_dir(vecs).iterdir() if p.is_dir()] == [before[0].parent]
+
+def test_model_change_forces_full_rebuild(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    calls = []
+    build_index(_items(("a", "one")), _fake_embedder(calls), vecs, meta, model="m1")
+    counts = build_index(_items(("a", "one")), _fake_embedder(calls), vecs, meta, model="m2", incremental=True)
+    assert counts["embedded"] == 1 and counts["reused"] == 0
+
+def test_dtype_change_forces_full_rebuild(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    calls = []
+    build_index(_items(("a", "one")), _fake_embedder(calls), vecs, meta, model="m", dtype="int8")
+    counts = build_index(_items(("a", "one")), _fake_embedder(calls), vecs, meta, model="m", dtype="float32",
+                         incremental=True)
+    assert counts["embedded"] == 1 and counts["reused"] == 0
+    assert np.allclose(VectorIndex.load(resolve_index(vecs, meta)[0]).vector(0), np.array([3, 1, 1]) / np.sqrt(11))
+
+def test_int8_build_reuses_dequantised_rows(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    calls = []
+    build_index(_items(("a", "one"), ("b", "two words")), _fake_embedder(calls), vecs, meta, model="m", dtype="int8")
+    counts = build_index(_items(("a", "one"), ("b", "two words")), _fake_embedder(calls), vecs, meta,
+                         model="m", dtype="int8", incremental=True)
+    assert counts["embedded"] == 0
+    assert VectorIndex.load(resolve_index(vecs, meta)[0]).dtype == "int8"
+
+def test_ann_index_written_and_removed_with_rebuilds(tmp_path):
+    vecs, meta = tmp_path / "index_vectors.npy", tmp_path / "index_meta.json"
+    items = _items(*[(str(i), "text %d" % i) for i in range(30)])
+    build_index(items, _fake_embedder([]), vecs, meta, model="m", ann_nlist=4)
+    cur = resolve_index(vecs, meta)[0]
+    assert IVFIndex.load(ivf_path(cur)).order.size == 30
+    assert len(LexicalIndex.load(lexical_path(cur))) == 30
+    build_index(items, _fake_embedder([]), vecs, meta, model="m")
+    assert not ivf_path(resolve_index(vecs, meta)[0]).exists()
@@ -0,0 +1,22 @@
+# tests/test_lexical.py
+import numpy as np
+
+from mh_core.lexical import LexicalIndex, tokenize
+
+TEXTS = [
+    "Talking with a trusted friend can help when worries pile up.",
+    "A short walk outside can lift your mood.",
+    "Write down your worries, then pick one small step.",
+]
+
+def test_tokenize_drops_stopwords_and_possessives():
+    assert tokenize("My friend’s worries and THE walk") == ["friend", "worries", "walk"]
+
+def test_bm25_ranks_and_round_trips(tmp_path):
+    idx = LexicalIndex.build(TEXTS)
+    assert [i for i, _ in idx.search("worries about a friend", 3)] == [0, 2]
+    assert idx.search("nothing matches here", 3) == []
+    idx.save(tmp_path / "lex.npz")
+    again = LexicalIndex.load(tmp_path / "lex.npz")
+    assert np.allclose(again.scores("worries walk"), idx.scores("worries walk"))
+    assert len(again) == 3
@@ -0,0 +1,46 @@
+# tests/test_metrics.py
+from fastapi.testclient import TestClient
+
+import mh_core.api as api
+from mh_core import metrics
+
+client = TestClient(api.app)
+
+def test_histogram_buckets_are_cumulative():
+    reg = metrics.Registry()
+    h = reg.histogram("t_seconds", "stage", "x", "test")
+    for v in (0.0002, 0.003, 0.003, 100.0):
+        h.observe(v)
+    text = reg.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{stage="x",le="0.00025"} 1' in text
+    assert 't_seconds_bucket{stage="x",le="0.005"} 3' in text
+    assert 't_seconds_bucket{stage="x",le="60"} 3' in text
+    assert 't_seconds_bucket{stage="x",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="x"} 4' in text
+
+def test_stage_feeds_the_active_trace_only():
+    with metrics.stage("outside"):
+        pass
+    trace, token = metrics.start_trace()
+    with metrics.stage("lexicon"):
+        pass
+    with metrics.stage("lexicon"):
+        pass
+    metrics.end_trace(token)
+    assert [name for name, _ in trace] == ["lexicon", "lexicon"]
+    assert metrics.server_timing(trace, 0.5).startswith("lexicon;dur=")
+    assert metrics.server_timing(trace, 0.5).endswith("total;dur=500.00")
+
+def test_chat_stages_reach_metrics_and_server_timing(monkeypatch):
+    async def fake_chat(messages, **kw):
+        return "Rest is important."
+    monkeypatch.setattr(api, "call_ollama_chat_async", fake_chat)
+    monkeypatch.setattr(api, "SERVER_TIMING", True)
+    r = client.post("/chat", json={"message": "tired and cranky today", "fast": True, "no_cache": True})
+    timing = r.headers["Server-Timing"]
+    for name in ("crisis", "lexicon", "prompt", "llm", "filter", "total"):
+        assert f"{name};dur=" in timing
+    text = client.get("/metrics").text
+    assert 'mh_stage_seconds_count{stage="llm"}' in text
+    assert 'mh_request_seconds_count{path="/chat"}' in text
@@ -0,0 +1,59 @@
+# tests/test_mock_ollama.py
+import asyncio
+import time
+
+import pytest
+
+from mh_core import ai_gateway, embeddings, rag
+from mh_core.mock_ollama import MockOllama
+
+MESSAGES = [{"role": "system", "content": "be kind"}, {"role": "user", "content": "cant sleep"}]
+
+def test_gateway_blocking_and_streaming_calls(mock_ollama):
+    reply = ai_gateway.call_ollama_chat(MESSAGES)
+    assert reply.endswith("?")
+    assert "".join(ai_gateway.stream_ollama_chat(MESSAGES)) == reply
+    async def collect():
+        return [p async for p in ai_gateway.stream_ollama_chat_async(MESSAGES)]
+    pieces = asyncio.run(collect())
+    assert len(pieces) > 3 and "".join(pieces) == reply
+    assert ai_gateway.LLM_TIMINGS.last["eval_count"] == len(pieces)
+    assert mock_ollama.stats()["/api/chat"] == 3
+
+def test_token_rate_and_latency_shape_timing(mock_ollama):
+    mock_ollama.config.latency = 0.05
+    mock_ollama.config.token_rate = 200
+    t0 = time.perf_counter()
+    pieces = list(ai_gateway.stream_ollama_chat(MESSAGES, max_tokens=10))
+    elapsed = time.perf_counter() - t0
+    assert len(pieces) == 10
+    assert 0.05 + 10 / 200 <= elapsed < 1.0
+
+def test_embeddings_match_the_hashing_backend(mock_ollama):
+    texts = ["stressed about exams", "missing home"]
+    vecs = embeddings.embed_many(texts, "nomic-embed-text", batch_size=1)
+    local = embeddings.HashingEmbedder().embed(texts)
+    assert all((a == b).all() for a, b in zip(vecs, local))
+    one = embeddings.OllamaEmbedder("nomic-embed-text").embed_query("missing home")
+    assert (one == local[1]).all()
+
+def test_failure_injection_is_retried_then_surfaces(mock_ollama):
+    mock_ollama.config.fail_rate = 1.0
+    with pytest.raises(embeddings.EmbedError):
+        embeddings.embed_many(["a"], "m", retries=1, backoff=0)
+    assert mock_ollama.stats()["failures"] == 2
+    assert ai_gateway.call_ollama_chat(MESSAGES) == "..."  # error body has no message
+
+def test_disconnects_make_rag_fall_back_to_lexical(mock_ollama, monkeypatch):
+    mock_ollama.config.fail_rate = 1.0
+    mock_ollama.config.fail_mode = "disconnect"
+    monkeypatch.setattr(rag, "_embed_cache", rag.OrderedDict())
+    monkeypatch.setattr(rag, "_backend", embeddings.OllamaEmbedder("m", timeout=2))
+    monkeypatch.setattr(rag, "_lexical", rag.LexicalIndex.build(["sleep tips for busy nights", "exam prep"]))
+    monkeypatch.setattr(rag, "_meta", [{"id": "a", "text": "sleep tips for busy nights"}, {"id": "b", "text": "exam prep"}])
+    monkeypatch.setattr(rag, "_index", rag.VectorIndex(rag.np.eye(2, dtype="float32")))
+    assert [h["id"] for h in rag.retrieve_snippets("no sleep on busy nights")] == ["a"]
+
+def test_invalid_fail_mode_is_rejected():
+    with pytest.raises(ValueError):
+        MockOllama(fail_mode="explode")
@@ -0,0 +1,41 @@
+# tests/test_phrases.py
+import random
+
+from mh_core.phrases import PhraseMatcher
+from mh_core.crisis import looks_okay_response
+from mh_core.language_style import _classify_worry, WORRY_KEYS
+
+def test_find_all_reports_overlapping_spans_and_categories():
+    m = PhraseMatcher({"a": ["he", "she", "hers"], "b": ["his"]})
+    found = {(x.start, x.end, x.phrase, x.category) for x in m.find_all("uSHErs his")}
+    assert found == {(1, 4, "she", "a"), (2, 4, "he", "a"), (2, 6, "hers", "a"), (7, 10, "his", "b")}
+
+def test_matches_substring_semantics_of_in():
+    words = ["ok", "okay", "no", "not ok", "no worries", "sad", "saddle", "low", "pay", "ice"]
+    m = PhraseMatcher({"w": words})
+    rng = random.Random(7)
+    alphabet = "okaynotsdlewrip "
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert {x.phrase for x in m.find_all(text)} == {w for w in words if w in text}
+
+def test_first_prefers_earliest_listed_phrase():
+    m = PhraseMatcher(WORRY_KEYS)
+    hit = m.first("i cant sleep before my exam")
+    assert (hit.category, hit.phrase) == ("study", "exam")
+    assert _classify_worry("my boss cut my shift") == ("work", "boss")
+    assert _classify_worry("nothing much") == ("", "")
+
+def test_looks_okay_response_uses_both_lists():
+    assert looks_okay_response("im ok now thanks")
+    assert looks_okay_response("nah, maybe later")
+    assert not looks_okay_response("i am not ok")
+    assert not looks_okay_response("still struggling")
+    assert not looks_okay_response("")
+
+def test_find_longest_whole_words_and_stable_spans():
+    m = PhraseMatcher({"a": ["yarn", "yarn up", "mob"]})
+    text = "İ yarn up, mobile mob"  # 'İ'.lower() is two characters
+    hits = m.find_longest(text)
+    assert [(h.phrase, text[h.start:h.end]) for h in hits] == [("yarn up", "yarn up"), ("mob", "mob")]
+    assert [h.phrase for h in m.find_longest("mobile", whole_words=False)] == ["mob"]
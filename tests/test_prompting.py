@@ -0,0 +1,61 @@
+# tests/test_prompting.py
+import json
+import os
+
+from mh_core import prompting
+from mh_core.content_loader import WatchedFile
+from mh_core.ai_gateway import SYSTEM_PROMPT
+
+def test_style_guide_is_read_once_and_reloaded_on_mtime_change(tmp_path, monkeypatch):
+    path = tmp_path / "style_guide_local.json"
+    path.write_text(json.dumps({"append": "Use short sentences."}), encoding="utf-8")
+    sg = WatchedFile(path, parse=prompting._parse_style_guide, default="", check_every=0)
+    assert sg.get() == "Use short sentences."
+
+    reads = []
+    orig = type(path).read_bytes
+    def counting_read(self, *a, **kw):
+        reads.append(self)
+        return orig(self, *a, **kw)
+    monkeypatch.setattr(type(path), "read_bytes", counting_read)
+
+    for _ in range(5):
+        assert sg.get() == "Use short sentences."
+    assert reads == []
+
+    path.write_text(json.dumps({"append": "Ask one question."}), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, (st.st_atime, st.st_mtime + 5))
+    assert sg.get() == "Ask one question."
+    assert len(reads) == 1
+
+def test_static_prompt_is_memoised_per_variant():
+    a = prompting._static_prompt(True, "Be kind.")
+    assert a is prompting._static_prompt(True, "Be kind.")
+    assert a.startswith(SYSTEM_PROMPT) and a.endswith("LOCAL STYLE GUIDE:\nBe kind.")
+    assert prompting._static_prompt(False, "Be kind.") == SYSTEM_PROMPT
+
+def test_build_system_prompt_appends_turn_parts():
+    s = prompting.build_system_prompt(False, ["yarn -> talk"], "- tip")
+    assert s == SYSTEM_PROMPT + "\n\nLEXICON NOTES (user terms):\n- yarn -> talk\n\nAPPROVED CONTEXT:\n- tip"
+
+def test_build_messages_keeps_static_prefix_identical():
+    a = prompting.build_messages(False, [], "", "hi there")
+    b = prompting.build_messages(False, ["yarn -> talk"], "- tip", "cant sleep")
+    assert a[0] == b[0] and a[0]["content"] == SYSTEM_PROMPT
+    assert [m["role"] for m in a] == ["system", "user"]
+    assert [m["role"] for m in b] == ["system", "system", "user"]
+    assert b[1]["content"] == "LEXICON NOTES (user terms):\n- yarn -> talk\n\nAPPROVED CONTEXT:\n- tip"
+
+def test_gateway_records_ollama_timings():
+    from mh_core import ai_gateway
+    timings = ai_gateway.LLMTimings()
+    body = {"message": {"content": "ok"}, "done": True, "prompt_eval_count": 12, "prompt_eval_duration": 30_000_000,
+            "eval_count": 40, "eval_duration": 800_000_000, "total_duration": 900_000_000}
+    parsed = ai_gateway.parse_timings(body)
+    assert parsed == {"prompt_eval_count": 12, "eval_count": 40, "total_ms": 900.0,
+                      "prompt_eval_ms": 30.0, "eval_ms": 800.0}
+    timings.record(parsed)
+    timings.record(dict(parsed, prompt_eval_count=8))
+    assert timings.stats()["avg"]["prompt_eval_count"] == 10 and timings.stats()["calls"] == 2
+    assert ai_gateway.parse_timings({"message": {}}) is None
@@ -0,0 +1,96 @@
+# tests/test_rag.py
+import numpy as np
+
+from mh_core import rag
+from mh_core.vector_index import VectorIndex
+
+def _unit(rows):
+    v = np.asarray(rows, dtype="float32")
+    return v / np.linalg.norm(v, axis=-1, keepdims=True)
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(3)
+    sims = rng.standard_normal(5000).astype("float32")
+    for k in (1, 3, 10, 5000, 6000):
+        expect = np.argsort(-sims, kind="stable")[:k]
+        assert list(rag._top_k(sims, k)) == list(expect)
+    assert rag._top_k(sims, 0).size == 0
+
+def test_retrieve_snippets_returns_scores(monkeypatch):
+    monkeypatch.setattr(rag, "_index", VectorIndex(_unit([[1, 0, 0], [0, 1, 0], [1, 1, 0]])))
+    monkeypatch.setattr(rag, "_meta", [
+        {"id": "a", "text": "sleep tips", "topic": "sleep"},
+        {"id": "b", "text": "study tips", "topic": "study"},
+        {"id": "c", "text": "both", "topic": "mixed"},
+    ])
+    monkeypatch.setattr(rag, "_embed_one", lambda text: _unit([1, 0.1, 0]))
+    hits = rag.retrieve_snippets("cant sleep at night lately", k=2)
+    assert [h["id"] for h in hits] == ["a", "c"]
+    assert hits[0]["score"] > hits[1]["score"]
+    assert rag.retrieve_context("cant sleep at night lately", k=2) == "- sleep tips\n- both"
+    assert rag.retrieve_snippets("hi") == []
+
+def test_quantised_indexes_rank_like_float32(tmp_path):
+    rng = np.random.default_rng(11)
+    vecs = _unit(rng.standard_normal((2000, 64)))
+    q = vecs[17]
+    exact = np.argsort(-(vecs @ q))[:5]
+    for dtype in ("float16", "int8"):
+        path = tmp_path / f"v_{dtype}.npy"
+        VectorIndex.from_vectors(vecs, dtype).save(path)
+        idx = VectorIndex.load(path, mmap=True)
+        assert isinstance(idx.data, np.memmap) and idx.dtype == dtype
+        idx.block = 300  # exercise the blocked path
+        scores = idx.scores(q)
+        assert np.abs(scores - vecs @ q).max() < 0.02
+        assert rag._top_k(scores, 1)[0] == exact[0]
+        assert len(set(rag._top_k(scores, 5)) & set(exact)) >= 4
+
+def _kb(monkeypatch):
+    texts = ["yarning with family helps when you feel alone",
+             "good sleep routine: same bedtime, no screens",
+             "study stress: break tasks into small steps"]
+    monkeypatch.setattr(rag, "_meta", [{"id": str(i), "text": t, "topic": ""} for i, t in enumerate(texts)])
+    monkeypatch.setattr(rag, "_index", VectorIndex(_unit([[1, 0, 0], [0, 1, 0], [0, 0, 1]])))
+    monkeypatch.setattr(rag, "_lexical", None)
+    monkeypatch.setattr(rag, "_files", (rag.Path("does-not-exist.npy"), rag.Path("does-not-exist.json")))
+
+def test_lexical_mode_never_embeds(monkeypatch):
+    _kb(monkeypatch)
+    monkeypatch.setattr(rag, "RAG_MODE", "lexical")
+    monkeypatch.setattr(rag, "_embed_one", lambda text: (_ for _ in ()).throw(AssertionError("embedded")))
+    hits = rag.retrieve_snippets("I can't sleep, my bedtime is all over the place", k=2)
+    assert [h["id"] for h in hits] == ["1"]
+
+def test_embedder_failure_falls_back_to_lexical(monkeypatch):
+    _kb(monkeypatch)
+    def down(text):
+        raise ConnectionRefusedError("ollama down")
+    monkeypatch.setattr(rag, "_embed_one", down)
+    assert [h["id"] for h in rag.retrieve_snippets("feeling alone lately, miss my family")] == ["0"]
+
+def test_hybrid_fuses_vector_and_lexical(monkeypatch):
+    _kb(monkeypatch)
+    monkeypatch.setattr(rag, "RAG_MODE", "hybrid")
+    # the vector leans to "study", the words say "sleep": equal weights let BM25 win
+    monkeypatch.setattr(rag, "_embed_one", lambda text: _unit([0, 0.6, 0.8]))
+    hits = rag.retrieve_snippets("need a sleep routine and bedtime", k=2)
+    assert [h["id"] for h in hits] == ["1", "2"]
+    assert rag.hybrid_search(_unit([0, 0.6, 0.8]), "need a sleep routine", k=1, alpha=1.0)[0][0] == 2
+
+def test_hashing_backend_serves_retrieval_offline(monkeypatch):
+    from mh_core.embeddings import HashingEmbedder
+    e = HashingEmbedder(dim=256)
+    texts = ["trouble sleeping at night", "worried about school exams", "missing family back home"]
+    monkeypatch.setattr(rag, "_backend", e)
+    monkeypatch.setattr(rag, "_embed_cache", rag.OrderedDict())
+    monkeypatch.setattr(rag, "_meta", [{"id": str(i), "text": t, "topic": ""} for i, t in enumerate(texts)])
+    monkeypatch.setattr(rag, "_index", VectorIndex(np.stack(e.embed(texts))))
+    assert rag.retrieve_snippets("really worried about my exams at school")[0]["id"] == "1"
+
+def test_index_from_other_embedder_uses_lexical(monkeypatch):
+    _kb(monkeypatch)  # 3-d vectors, while the query embedder gives 256-d
+    from mh_core.embeddings import HashingEmbedder
+    monkeypatch.setattr(rag, "_backend", HashingEmbedder(dim=256))
+    monkeypatch.setattr(rag, "_embed_cache", rag.OrderedDict())
+    assert [h["id"] for h in rag.retrieve_snippets("feeling alone lately, miss my family")] == ["0"]
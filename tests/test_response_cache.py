@@ -0,0 +1,71 @@
+# tests/test_response_cache.py
+from fastapi.testclient import TestClient
+
+import mh_core.api as api
+from mh_core import response_cache
+from mh_core.response_cache import ResponseCache, normalize_user_text, response_key
+from mh_core.safety import BLOCKED_REPLY
+
+client = TestClient(api.app)
+
+def _msgs(user, context=""):
+    return [{"role": "system", "content": "SYSTEM" + context}, {"role": "user", "content": user}]
+
+def test_key_ignores_surface_differences_only():
+    kw = {"temperature": 0.3, "top_p": 0.9, "max_tokens": 90}
+    base = response_key(_msgs("im stressed about exams"), kw, "m")
+    assert normalize_user_text("  Im  STRESSED about exams!! ") == "im stressed about exams"
+    assert response_key(_msgs("Im stressed about exams."), kw, "m") == base
+    assert response_key(_msgs("im stressed about exams", context="- tip"), kw, "m") != base
+    assert response_key(_msgs("im stressed about exams"), dict(kw, max_tokens=60), "m") != base
+    assert response_key(_msgs("im stressed about exams"), kw, "other") != base
+
+def test_error_replies_are_not_cached():
+    c = ResponseCache(4, 60)
+    assert not c.put("k", "Sorry, I had trouble thinking just now.")
+    assert not c.put("k", BLOCKED_REPLY)
+    assert c.put("k", "Exams are a lot.") and c.get("k") == "Exams are a lot."
+
+def test_chat_serves_repeats_from_cache_and_honours_opt_out(monkeypatch):
+    monkeypatch.setattr(response_cache, "_CACHE", ResponseCache(16, 60))
+    monkeypatch.setattr(response_cache, "_CACHE_READY", True)
+    calls = []
+    async def fake_chat(messages, **kw):
+        calls.append(messages[-1]["content"])
+        return f"reply {len(calls)}"
+    monkeypatch.setattr(api, "call_ollama_chat_async", fake_chat)
+    first = client.post("/chat", json={"message": "cant sleep again", "fast": True}).json()["reply"]
+    again = client.post("/chat", json={"message": "Cant sleep again.", "fast": True}).json()["reply"]
+    fresh = client.post("/chat", json={"message": "cant sleep again", "fast": True, "no_cache": True}).json()["reply"]
+    assert first == again == "reply 1" and fresh == "reply 2"
+    stats = client.get("/debug/response-cache").json()
+    assert stats["hits"] == 1 and stats["skipped"] == 1
+
+def test_chat_stream_replays_cached_reply(monkeypatch):
+    monkeypatch.setattr(response_cache, "_CACHE", ResponseCache(16, 60))
+    monkeypatch.setattr(response_cache, "_CACHE_READY", True)
+    async def fake_stream(messages, **kw):
+        for piece in ["Rest ", "matters."]:
+            yield piece
+    monkeypatch.setattr(api, "stream_ollama_chat_async", fake_stream)
+    client.post("/chat/stream", json={"message": "so tired all the time", "fast": True})
+    async def no_stream(messages, **kw):
+        raise AssertionError("model called on a cache hit")
+        yield ""
+    monkeypatch.setattr(api, "stream_ollama_chat_async", no_stream)
+    r = client.post("/chat/stream", json={"message": "so tired all the time", "fast": True})
+    assert "event: token" in r.text and '"reply": "Rest matters."' in r.text
+
+def test_filtered_replies_are_not_cached(monkeypatch):
+    monkeypatch.setattr(response_cache, "_CACHE", ResponseCache(16, 60))
+    monkeypatch.setattr(response_cache, "_CACHE_READY", True)
+    async def fake_chat(messages, **kw):
+        return "You could call someone you trust."
+    async def fake_stream(messages, **kw):
+        for piece in ["You could ", "call someone ", "you trust."]:
+            yield piece
+    monkeypatch.setattr(api, "call_ollama_chat_async", fake_chat)
+    monkeypatch.setattr(api, "stream_ollama_chat_async", fake_stream)
+    assert client.post("/chat", json={"message": "who helps", "fast": True}).json()["reply"] == BLOCKED_REPLY
+    client.post("/chat/stream", json={"message": "who helps", "fast": True})
+    assert len(response_cache.get_response_cache()._cache) == 0
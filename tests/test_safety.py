@@ -0,0 +1,82 @@
+# tests/test_safety.py
+import json
+import os
+
+from mh_core import safety
+from mh_core.content_loader import WatchedFile
+
+def test_assess_message_levels():
+    assert safety.assess_message("i wanna die").level == "crisis"
+    assert safety.assess_message("sometimes i can't go on").level == "monitor"
+    assert safety.assess_message("study is hard").level == "none"
+    assert safety.assess_message("").level == "none"
+
+def test_crisis_hit_carries_contacts():
+    res = safety.assess_message("i want to self harm")
+    assert res.trigger.lower() == "self harm"
+    assert res.contacts["lifeline"] == "13 11 14"
+
+def test_registry_compiles_once_and_hot_reloads(tmp_path):
+    path = tmp_path / "crisis_patterns.local.json"
+    path.write_text(json.dumps([r"\bwalk into the sea\b", "(unclosed"]), encoding="utf-8")
+    reg = safety.PatternRegistry([r"\bkys\b"], WatchedFile(path, parse=safety._parse_local_patterns, default=[], check_every=0))
+
+    first = reg.get()
+    assert first is reg.get()  # no recompile while the file is unchanged
+    assert first.sources == [r"\bkys\b", r"\bwalk into the sea\b"]  # broken regex skipped
+    idx, m = first.search("I might walk into the sea")
+    assert idx == 1 and m.group(0) == "walk into the sea"
+
+    path.write_text(json.dumps([r"\bno way out\b"]), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    second = reg.get()
+    assert second is not first
+    assert second.search("there is no way out")[0] == 1
+    assert second.search("walk into the sea") is None
+
+def test_screen_batch_matches_assess_message_with_spans():
+    texts = ["i wanna die", "sometimes i can't go on", "study is hard", "", "ok so i might self harm tonight"]
+    results = safety.screen_batch(texts)
+    for text, r in zip(texts, results):
+        ref = safety.assess_message(text)
+        assert (r.level, r.trigger) == (ref.level, ref.trigger)
+    assert results[4].span == (14, 23) and texts[4][slice(*results[4].span)] == "self harm"
+    assert results[1].span is not None and results[2].span is None and results[4].pattern is not None
+
+def test_screen_batch_process_pool_gives_same_results(monkeypatch):
+    texts = ["kys", "fine", "no reason to live", "i want to take my life", "exams"]
+    in_process = safety.screen_batch(texts)
+    monkeypatch.setattr(safety, "_SCREEN_CHUNK", 2)
+    monkeypatch.setattr(safety, "SCREEN_WORKERS", 2)
+    monkeypatch.setattr(safety, "_POOL", None)
+    assert safety.screen_batch(texts) == in_process
+    pool = safety._POOL
+    assert safety.screen_batch(texts) == in_process and safety._POOL is pool  # one pool, reused
+    pool.shutdown()
+
+def test_screen_batch_endpoint():
+    from fastapi.testclient import TestClient
+    from mh_core.api import app
+
+    r = TestClient(app).post("/screen/batch", json={"messages": ["i wanna die", "all good"]})
+    data = r.json()
+    assert r.status_code == 200 and data["counts"] == {"none": 1, "monitor": 0, "crisis": 1}
+    assert data["results"][0]["level"] == "crisis" and data["results"][0]["span"] == [0, 11]
+
+def test_registry_keeps_screening_with_flag_and_backref_patterns(tmp_path):
+    path = tmp_path / "crisis_patterns.local.json"
+    path.write_text(json.dumps([r"(?i)\bunalive\b", r"\b(no)\s+\1\s+more\b"]), encoding="utf-8")
+    reg = safety.PatternRegistry([r"\bkys\b"], WatchedFile(path, parse=safety._parse_local_patterns, default=[], check_every=0))
+    compiled = reg.get()
+    assert len(compiled.sources) == 3 and [i for i, _ in compiled.standalone] == [1, 2]
+    idx, m = compiled.search("thinking i might UNALIVE")
+    assert idx == 1 and m.group(0) == "UNALIVE"
+    assert compiled.search("no no more")[0] == 2
+    assert compiled.search("kys")[0] == 0  # the alternation still works alongside
+    assert [r.level for r in safety._screen(compiled, ["unalive", "no no more", "fine"])] == ["crisis", "crisis", "none"]
+
+def test_clashing_group_names_fall_back_to_separate_searches():
+    compiled = safety.CompiledPatterns([r"\bkys\b", r"(?P<x>walk into the sea)", r"(?P<x>no way out)"])
+    assert compiled.search("there is no way out")[0] == 2
+    assert compiled.search("kys")[0] == 0
@@ -0,0 +1,91 @@
+# tests/test_sessions.py
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mh_core import api, sessions
+from mh_core.cache import TTLCache
+from mh_core.models import ChatState
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_ttl_cache_evicts_by_size_and_age():
+    clock = _Clock()
+    c = TTLCache(max_entries=2, ttl=10, clock=clock)
+    c.put("a", 1); c.put("b", 2)
+    assert c.get("a") == 1
+    c.put("c", 3)  # "b" is least recently used
+    assert "b" not in c and c.get("a") == 1
+    clock.now = 11
+    assert c.get("a") is None
+    st = c.stats()
+    assert st["evictions"] == 1 and st["expirations"] == 1 and st["hits"] == 2
+
+def test_stores_round_trip_and_expire(tmp_path):
+    for store in (sessions.MemorySessionStore(10, ttl=60),
+                  sessions.SQLiteSessionStore(tmp_path / "s.sqlite3", 10, ttl=60)):
+        sid = store.create(ChatState(worries=["exams"]))
+        st = store.get(sid)
+        st.goal = "sleep earlier"
+        assert store.get(sid).goal == ""  # handler copies are not shared
+        store.put(sid, st)
+        assert store.get(sid).goal == "sleep earlier"
+        store.delete(sid)
+        assert store.get("nope") is None and store.get(sid) is None
+    short = sessions.SQLiteSessionStore(tmp_path / "t.sqlite3", 10, ttl=-1)
+    assert short.get(short.create()) is None
+    assert short.stats()["expirations"] == 1
+
+def test_sqlite_store_is_bounded(tmp_path):
+    store = sessions.SQLiteSessionStore(tmp_path / "s.sqlite3", max_sessions=10)
+    for _ in range(25):
+        store.create()
+    assert store.stats()["entries"] <= 10 and store.stats()["evictions"] > 0
+
+def test_api_keeps_state_server_side(monkeypatch):
+    monkeypatch.setattr(sessions, "_STORE", sessions.MemorySessionStore(100, 60))
+    monkeypatch.setattr(sessions, "_STORE_READY", True)
+    client = TestClient(api.app)
+    sid = client.post("/reset").json()["session_id"]
+    r = client.post("/chat", json={"message": "i want to end it", "session_id": sid}).json()
+    assert r["session_id"] == sid and r["state"] is None
+    assert sessions.get_store().get(sid).crisis == "check"
+    r = client.post("/chat", json={"message": "im ok now", "session_id": sid}).json()
+    assert sessions.get_store().get(sid).crisis == "done"
+    # an unknown or expired id gets a fresh, server-issued session
+    r = client.post("/chat", json={"message": "", "session_id": "made-up"}).json()
+    assert r["session_id"] not in ("made-up", sid)
+    assert client.get("/debug/sessions").json()["entries"] == 2
+
+def test_sqlite_store_calls_run_off_the_event_loop(tmp_path, monkeypatch):
+    on_loop = []
+
+    class Probe(sessions.SQLiteSessionStore):
+        def _note(self):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+        def get(self, sid):
+            self._note()
+            return super().get(sid)
+        def put(self, sid, state):
+            self._note()
+            super().put(sid, state)
+
+    monkeypatch.setattr(sessions, "_STORE", Probe(tmp_path / "s.sqlite3", 100, 60))
+    monkeypatch.setattr(sessions, "_STORE_READY", True)
+    client = TestClient(api.app)
+    sid = client.post("/reset").json()["session_id"]
+    client.post("/chat", json={"message": "i want to end it", "session_id": sid})
+    assert on_loop and not any(on_loop)
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        sessions.SessionStore()
@@ -0,0 +1,66 @@
+# tests/test_streaming.py
+import json
+from fastapi.testclient import TestClient
+
+import mh_core.api as api
+from mh_core.models import ChatState
+from mh_core.safety import StreamingReplyFilter, BLOCKED_REPLY
+
+client = TestClient(api.app)
+
+def _events(raw: str):
+    out = []
+    for block in raw.strip().split("\n\n"):
+        lines = block.split("\n")
+        event = lines[0][len("event: "):]
+        data = json.loads(lines[1][len("data: "):])
+        out.append((event, data))
+    return out
+
+def test_streaming_filter_releases_text_incrementally():
+    f = StreamingReplyFilter()
+    shown = "".join(f.feed(p) for p in ["Try a short ", "walk and some ", "slow breathing."])
+    shown += f.finish()
+    assert shown == "Try a short walk and some slow breathing."
+    assert not f.blocked
+
+def test_streaming_filter_never_shows_part_of_a_blocked_term():
+    f = StreamingReplyFilter()
+    shown = "".join(f.feed(p) for p in ["You could ring 18", "00 123 456"])
+    shown += f.finish()
+    assert f.blocked
+    assert "18" not in shown
+    assert f.reply == BLOCKED_REPLY
+
+def test_chat_stream_forwards_tokens_and_final_state(monkeypatch):
+    async def fake_stream(messages, **kw):
+        for piece in ["Exams can ", "feel heavy. ", "What helps you rest?"]:
+            yield piece
+    monkeypatch.setattr(api, "stream_ollama_chat_async", fake_stream)
+    r = client.post("/chat/stream", json={"message": "im stressed about exams", "state": ChatState().model_dump(), "fast": True})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _events(r.text)
+    assert events[-1][0] == "done"
+    tokens = "".join(d["text"] for e, d in events if e == "token")
+    assert tokens == "Exams can feel heavy. What helps you rest?"
+    assert events[-1][1]["reply"] == tokens
+    assert events[-1][1]["state"]["crisis"] == "none"
+
+def test_chat_stream_crisis_turn_is_a_single_done_event():
+    r = client.post("/chat/stream", json={"message": "i want to end it", "state": ChatState().model_dump()})
+    events = _events(r.text)
+    assert [e for e, _ in events] == ["done"]
+    assert events[0][1]["mode"] == "crisis"
+    assert events[0][1]["state"]["crisis"] == "check"
+
+def test_chat_async_pipeline_uses_async_gateway(monkeypatch):
+    seen = {}
+    async def fake_chat(messages, **kw):
+        seen["system"] = messages[0]["content"]
+        return "Small steps can help. What feels doable today?"
+    monkeypatch.setattr(api, "call_ollama_chat_async", fake_chat)
+    r = client.post("/chat", json={"message": "cant sleep", "state": ChatState().model_dump(), "fast": True})
+    assert r.status_code == 200
+    assert r.json()["reply"] == "Small steps can help. What feels doable today?"
+    assert seen["system"].startswith("You are a culturally safe support assistant")